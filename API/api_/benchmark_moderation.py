@@ -0,0 +1,258 @@
+"""
+Banc d'essai du débit de modération d'images
+
+Mesure analyze_image, batch_analyze et la route HTTP sur des images synthétiques
+(plusieurs résolutions, modes et formats) et écrit un rapport JSON comparable
+d'une exécution à l'autre:
+
+    python benchmark_moderation.py --output bench.json
+"""
+import argparse
+import asyncio
+import base64
+import io
+import json
+import os
+import platform
+import resource
+import sys
+import time
+from datetime import datetime
+from PIL import Image
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+
+from content_moderator import ContentModerator
+
+RESOLUTIONS = {"small": (320, 240), "medium": (1280, 960), "large": (4000, 3000)}
+MODES = ["RGB", "RGBA", "L", "P"]
+FORMATS = ["JPEG", "PNG", "GIF"]
+
+# Modes que chaque format sait encoder tels quels
+FORMAT_MODES = {"JPEG": {"RGB", "L"}, "PNG": {"RGB", "RGBA", "L", "P"}, "GIF": {"L", "P"}}
+
+def synthetic_image(size: Tuple[int, int], mode: str, seed: int = 0) -> Image.Image:
+    """
+    Génère une image synthétique: dégradé, zone couleur peau et bruit
+
+    Le bruit rend la compression réaliste (ni triviale ni incompressible).
+    """
+    width, height = size
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:height, 0:width]
+    pixels = np.empty((height, width, 3), dtype=np.uint8)
+    pixels[:, :, 0] = (x * 255 // max(1, width - 1)).astype(np.uint8)
+    pixels[:, :, 1] = (y * 255 // max(1, height - 1)).astype(np.uint8)
+    pixels[:, :, 2] = 128
+    pixels[height // 4:height // 2, width // 4:width // 2] = (205, 140, 110)
+    noise = rng.integers(-12, 13, size=pixels.shape, dtype=np.int16)
+    pixels = np.clip(pixels.astype(np.int16) + noise, 0, 255).astype(np.uint8)
+
+    image = Image.fromarray(pixels)
+    if mode == "RGBA":
+        image.putalpha(200)
+    elif mode != "RGB":
+        image = image.convert(mode)
+    return image
+
+def encode(image: Image.Image, image_format: str) -> bytes:
+    buffer = io.BytesIO()
+    image.save(buffer, image_format)
+    return buffer.getvalue()
+
+def build_corpus(resolutions: List[str]) -> List[Dict]:
+    """Construit la liste des cas (résolution x mode x format) encodés"""
+    corpus = []
+    for resolution in resolutions:
+        for mode in MODES:
+            image = synthetic_image(RESOLUTIONS[resolution], mode)
+            for image_format in FORMATS:
+                if mode not in FORMAT_MODES[image_format]:
+                    continue
+                corpus.append({
+                    "resolution": resolution,
+                    "mode": mode,
+                    "format": image_format,
+                    "data": encode(image, image_format)
+                })
+    return corpus
+
+def latency_summary(latencies_ms: List[float], elapsed_s: float, images: int) -> Dict:
+    """Percentiles de latence et débit d'un scénario"""
+    values = np.asarray(latencies_ms, dtype=np.float64)
+    return {
+        "images": images,
+        "elapsed_s": elapsed_s,
+        "images_per_sec": images / elapsed_s if elapsed_s > 0 else 0.0,
+        "latency_ms": {
+            "mean": float(values.mean()) if len(values) else 0.0,
+            "p50": float(np.percentile(values, 50)) if len(values) else 0.0,
+            "p90": float(np.percentile(values, 90)) if len(values) else 0.0,
+            "p99": float(np.percentile(values, 99)) if len(values) else 0.0,
+            "max": float(values.max()) if len(values) else 0.0
+        }
+    }
+
+def process_rss_mb(pid: int) -> Optional[Dict]:
+    """
+    Mémoire résidente courante et de pointe d'un processus vivant (Mo), lue dans
+    /proc/<pid>/status (Linux); None si elle n'est pas disponible
+    """
+    values = {}
+    try:
+        with open(f"/proc/{pid}/status", "r", encoding="ascii") as f:
+            for line in f:
+                name, _, value = line.partition(":")
+                if name in ("VmRSS", "VmHWM"):
+                    values[name] = int(value.split()[0]) / 1024
+    except (OSError, ValueError):
+        return None
+    if "VmRSS" not in values:
+        return None
+    return {"rss": values["VmRSS"], "peak": values.get("VmHWM", values["VmRSS"])}
+
+def peak_rss_mb(moderator: ContentModerator) -> Dict:
+    """
+    Pic de mémoire résidente du processus et mémoire des processus de travail
+    vivants du batch (Mo)
+    
+    RUSAGE_CHILDREN ne compte que les processus terminés et attendus: les
+    processus du pool, toujours vivants, sont lus un par un.
+    """
+    # ru_maxrss est en octets sous macOS, en kilo-octets ailleurs
+    divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+    workers = {}
+    for pid in moderator.batch_worker_pids():
+        usage = process_rss_mb(pid)
+        if usage is not None:
+            workers[str(pid)] = usage
+    return {
+        "self": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / divisor,
+        "workers": workers,
+        "workers_rss_total": sum(usage["rss"] for usage in workers.values())
+    }
+
+async def bench_analyze_image(moderator: ContentModerator, case: Dict, iterations: int) -> Dict:
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(iterations):
+        call_start = time.perf_counter()
+        await moderator.analyze_image(case["data"])
+        latencies.append((time.perf_counter() - call_start) * 1000)
+    return latency_summary(latencies, time.perf_counter() - start, iterations)
+
+async def bench_batch_analyze(moderator: ContentModerator, case: Dict, batch_size: int,
+                              iterations: int) -> Dict:
+    latencies = []
+    batch = [case["data"]] * batch_size
+    # Lot non chronométré: lancement des processus et premiers imports hors mesure
+    await moderator.batch_analyze(batch)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        call_start = time.perf_counter()
+        await moderator.batch_analyze(batch)
+        latencies.append((time.perf_counter() - call_start) * 1000)
+    summary = latency_summary(latencies, time.perf_counter() - start, iterations * batch_size)
+    summary["batch_size"] = batch_size
+    return summary
+
+def bench_http(case: Dict, iterations: int) -> Optional[Dict]:
+    """Mesure les routes HTTP base64 et binaire via le client de test FastAPI"""
+    try:
+        from fastapi.testclient import TestClient
+        import main
+    except ImportError:
+        return None
+
+    encoded = base64.b64encode(case["data"]).decode("ascii")
+    results = {}
+    # Le contexte du client exécute le démarrage de l'application (services IA)
+    with TestClient(main.app) as client:
+        # Mesurer l'analyse elle-même, pas le cache des verdicts
+        main.content_moderator.verdict_cache = None
+        for route, send in (
+            ("base64", lambda: client.post("/api/content/analyze-image", json={"image_data": encoded})),
+            ("binary", lambda: client.post(
+                "/api/content/analyze-image/binary",
+                content=case["data"],
+                headers={"content-type": "application/octet-stream"}
+            ))
+        ):
+            latencies = []
+            start = time.perf_counter()
+            for _ in range(iterations):
+                call_start = time.perf_counter()
+                response = send()
+                response.raise_for_status()
+                latencies.append((time.perf_counter() - call_start) * 1000)
+            results[route] = latency_summary(latencies, time.perf_counter() - start, iterations)
+    return results
+
+async def run_benchmarks(args) -> Dict:
+    corpus = build_corpus(args.resolutions)
+    moderator = ContentModerator(batch_workers=args.workers, cache_size=0)
+    cases = []
+    try:
+        for case in corpus:
+            label = f"{case['resolution']}-{case['mode']}-{case['format']}"
+            print(f"[bench] {label}", file=sys.stderr)
+            entry = {
+                "resolution": case["resolution"],
+                "size": RESOLUTIONS[case["resolution"]],
+                "mode": case["mode"],
+                "format": case["format"],
+                "encoded_bytes": len(case["data"]),
+                "analyze_image": await bench_analyze_image(moderator, case, args.iterations),
+                "batch_analyze": await bench_batch_analyze(moderator, case, args.batch_size, args.batch_iterations)
+            }
+            if not args.skip_http:
+                entry["http"] = bench_http(case, args.iterations)
+            entry["peak_rss_mb"] = peak_rss_mb(moderator)
+            cases.append(entry)
+        # Dernière mesure avant l'arrêt du pool, tant que ses processus sont vivants
+        final_rss = peak_rss_mb(moderator)
+    finally:
+        moderator.shutdown()
+
+    return {
+        "benchmark": "content_moderation",
+        "timestamp": datetime.now().isoformat(),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "numpy": np.__version__,
+            "pillow": Image.__version__,
+            "batch_workers": moderator.batch_workers
+        },
+        "parameters": {
+            "iterations": args.iterations,
+            "batch_size": args.batch_size,
+            "batch_iterations": args.batch_iterations,
+            "batch_warmup": 1
+        },
+        "cases": cases,
+        "peak_rss_mb": final_rss
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Banc d'essai de ContentModerator")
+    parser.add_argument("--resolutions", nargs="+", choices=sorted(RESOLUTIONS), default=["small", "medium", "large"])
+    parser.add_argument("--iterations", type=int, default=5, help="Appels par cas (analyze_image et HTTP)")
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--batch-iterations", type=int, default=2)
+    parser.add_argument("--workers", type=int, default=None, help="Processus du batch (défaut: nombre de CPU)")
+    parser.add_argument("--skip-http", action="store_true", help="Ne pas mesurer les routes HTTP")
+    parser.add_argument("--output", help="Fichier JSON de sortie (défaut: sortie standard)")
+    args = parser.parse_args()
+
+    report = asyncio.run(run_benchmarks(args))
+    payload = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(payload)
+    else:
+        print(payload)
+
+if __name__ == "__main__":
+    main()
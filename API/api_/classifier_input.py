@@ -0,0 +1,21 @@
+from PIL import Image
+import numpy as np
+
+def classifier_thumbnail(image: Image.Image, size: int) -> np.ndarray:
+    """
+    Réduit une image à la vignette RGB uint8 attendue par le classifieur
+    
+    Ne dépend pas de torch: la vignette peut être calculée dans un processus
+    de travail puis scorée dans le processus principal.
+    
+    Args:
+        image: Image PIL (tout mode)
+        size: Côté de la vignette carrée
+    
+    Returns:
+        np.ndarray: Vignette (size, size, 3) en uint8
+    """
+    thumbnail = image.resize((size, size), Image.BILINEAR, reducing_gap=2.0)
+    if thumbnail.mode != "RGB":
+        thumbnail = thumbnail.convert("RGB")
+    return np.asarray(thumbnail, dtype=np.uint8)
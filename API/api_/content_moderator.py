@@ -1,22 +1,201 @@
 import os
 import io
+import time
+import asyncio
+import queue
+import itertools
+import threading
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from PIL import Image
 import numpy as np
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 import base64
 import json
+import hashlib
+
+from perceptual_cache import PerceptualHashCache, colour_signature, colours_match, image_fingerprint, perceptual_hash
+from skin_regions import analyze_skin_regions
+from moderation_stats import ModerationStats
+from classifier_input import classifier_thumbnail
+from decode_admission import DecodeAdmissionController, DecodeAdmissionError, estimate_decoded_bytes
+
+# Niveaux des canaux (0-255) et leurs carrés, pour les moments de l'histogramme
+_CHANNEL_LEVELS = np.arange(256, dtype=np.float64)
+_CHANNEL_LEVELS_SQUARED = _CHANNEL_LEVELS * _CHANNEL_LEVELS
+
+class BatchWorkerPool:
+    """
+    Pool de processus du batch dont chaque tâche signale son démarrage effectif
+    
+    Les processus écrivent l'identifiant de la tâche qu'ils commencent dans une
+    file lue par un thread, qui note l'instant de réception: le délai maximal
+    d'une analyse ne compte ni l'attente derrière les autres tâches ni le
+    lancement des processus.
+    """
+    
+    def __init__(self, workers: int):
+        context = multiprocessing.get_context("spawn")
+        self.workers = workers
+        # Identifiant de tâche -> instant (time.monotonic) de son démarrage
+        self.started: Dict[int, float] = {}
+        # Vrai une fois le pool arrêté pour cause de tâche bloquée
+        self.recycled = False
+        self._stopped = False
+        self._job_ids = itertools.count()
+        self._started_queue = context.Queue()
+        self.executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=context,
+            initializer=_init_batch_worker,
+            initargs=(self._started_queue,)
+        )
+        self._reader = threading.Thread(target=self._read_started, daemon=True)
+        self._reader.start()
+    
+    def _read_started(self):
+        # Attente bornée: un processus interrompu en pleine écriture ne bloque pas l'arrêt
+        while not self._stopped:
+            try:
+                job_id = self._started_queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            self.started[job_id] = time.monotonic()
+    
+    @property
+    def broken(self) -> bool:
+        return self.recycled or self.executor._broken
+    
+    def submit(self, settings: Dict, image_data: bytes) -> Tuple[int, Future]:
+        """Soumet l'analyse d'une image; renvoie l'identifiant de la tâche et son futur"""
+        job_id = next(self._job_ids)
+        return job_id, self.executor.submit(_analyze_image_in_worker, settings, image_data, job_id)
+    
+    def shutdown(self, terminate: bool = False):
+        """
+        Arrête le pool; terminate interrompt aussi les analyses en cours (tâche
+        bloquée), celles des autres images échouant alors avec BrokenProcessPool
+        """
+        processes = list((self.executor._processes or {}).values())
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        if terminate:
+            self.recycled = True
+            for process in processes:
+                process.terminate()
+        self._stopped = True
 
 class ContentModerator:
     """Service de modération de contenu pour détecter les images inappropriées"""
     
-    def __init__(self):
-        self.nudity_threshold = 0.7
+    # Nombre de pixels traités par bloc lors du calcul des statistiques
+    PIXEL_BLOCK_SIZE = 1 << 16
+    # Plus grand côté de la grille de peau sous-échantillonnée pour les zones connexes
+    SKIN_GRID_SIZE = 256
+    # Octets de travail par pixel d'une bande (découpe PIL, conversion RGB et tableau numpy)
+    STRIP_BYTES_PER_PIXEL = 8
+    # Distance de dHash en dessous de laquelle deux images animées sont la même scène
+    SCENE_CHANGE_DISTANCE = 6
+    # Gravité des recommandations, pour retenir la pire image d'une animation
+    RECOMMENDATION_SEVERITY = {"approve": 0, "review": 1, "reject": 2}
+    # Modes que Image.reduce() sait traiter directement
+    REDUCIBLE_MODES = {"RGB", "RGBA", "L", "LA", "CMYK", "I", "F"}
+    # Intervalle (secondes) de vérification du démarrage d'une tâche du batch
+    BATCH_START_POLL = 0.05
+    # Exceptions du décodage signalant une image illisible plutôt qu'une panne
+    INVALID_IMAGE_ERRORS = (OSError, SyntaxError, EOFError, Image.DecompressionBombError)
+    
+    def __init__(self, batch_workers: Optional[int] = None, batch_timeout: float = 30.0,
+                 cache_size: int = 10000, cache_path: Optional[str] = None,
+                 cache_ttl: Optional[float] = 7 * 24 * 3600.0,
+                 memory_budget: int = 32 * 1024 * 1024, max_animation_frames: int = 8,
+                 animation_time_budget: float = 2.0, classifier=None, classifier_weight: float = 0.5,
+                 cascade_band: Optional[Tuple[float, float]] = (0.3, 0.7), cascade_size: int = 256,
+                 decode_budget: int = 512 * 1024 * 1024, admission_timeout: float = 10.0):
+        # Seuil de nudité plus strict que celui de la violence
+        self.nudity_threshold = 0.5
         self.violence_threshold = 0.8
         
+        # Backend de classification optionnel (ex: TorchClassifierBackend), combiné
+        # aux heuristiques; seule la taille de vignette est transmise aux processus
+        self.classifier = classifier
+        self.classifier_weight = classifier_weight
+        self.classifier_input_size = classifier.input_size if classifier is not None else 0
+        
+        # Mémoire de travail maximale (octets) pour l'analyse des pixels, par bandes
+        self.memory_budget = memory_budget
+        
+        # Images animées: nombre d'images échantillonnées et budget de temps (secondes)
+        self.max_animation_frames = max_animation_frames
+        self.animation_time_budget = animation_time_budget
+        
+        # Cascade: score d'abord une version réduite (plus grand côté ~cascade_size)
+        # et n'analyse en pleine résolution que si un score tombe dans cascade_band
+        # (None = toujours en pleine résolution)
+        self.cascade_band = cascade_band
+        self.cascade_size = cascade_size
+        
+        # Cache des verdicts par empreinte perceptuelle (0 = désactivé); chaque
+        # verdict expire après cache_ttl secondes (None = jamais)
+        self.verdict_cache = (
+            PerceptualHashCache(max_entries=cache_size, persist_path=cache_path, ttl=cache_ttl)
+            if cache_size > 0 else None
+        )
+        
+        # Exécution des batchs dans un pool de processus (0 = analyse séquentielle)
+        self.batch_workers = (os.cpu_count() or 1) if batch_workers is None else batch_workers
+        self.batch_timeout = batch_timeout
+        self._batch_pool: Optional[BatchWorkerPool] = None
+        
+        # Agrégats de modération en flux (mémoire constante)
+        self.stats = ModerationStats()
+        
+        # Budget global de mémoire de décodage, partagé par l'analyse unitaire et les batchs
+        self.decode_admission = DecodeAdmissionController(decode_budget, admission_timeout)
+        
     async def analyze_image(self, image_data: bytes) -> Dict:
         """
         Analyse une image pour détecter du contenu inapproprié
         
+        Args:
+            image_data: Données binaires de l'image
+            
+        Returns:
+            Dict: Résultat de l'analyse
+            
+        Raises:
+            DecodeAdmissionError: Budget de décodage saturé ou image trop volumineuse
+        """
+        # Image trop grande pour le budget: refusée avant tout décodage, cache compris
+        cost = estimate_decoded_bytes(image_data)
+        self.decode_admission.check_size(cost)
+        
+        # Image déjà vue à l'identique: verdict en cache sans décodage
+        result, digest, settings = None, None, None
+        if self.verdict_cache is not None:
+            settings = self._verdict_settings()
+            result, digest = self.verdict_cache.lookup_exact(image_data, settings)
+        
+        if result is None:
+            fingerprint = None
+            async with self.decode_admission.admit(cost):
+                # L'empreinte perceptuelle décode l'image: elle relève du budget
+                if self.verdict_cache is not None:
+                    result, fingerprint = self.verdict_cache.lookup_similar(digest, image_fingerprint(image_data), settings)
+                if result is None:
+                    result = self._analyze_image_bytes(image_data)
+            if not result.get("cached"):
+                result = await self._apply_classifier(result)
+                if self.verdict_cache is not None:
+                    self.verdict_cache.store(fingerprint, result)
+        
+        self.stats.record(result)
+        return result
+    
+    def _analyze_image_bytes(self, image_data: bytes) -> Dict:
+        """
+        Analyse synchrone d'une image, utilisable depuis un processus de travail
+        
         Args:
             image_data: Données binaires de l'image
             
@@ -25,6 +204,7 @@ class ContentModerator:
         """
         try:
             # Convertir les bytes en image PIL
+            decode_start = time.perf_counter()
             image = Image.open(io.BytesIO(image_data))
             
             # Vérifier si c'est l'image mia.jpg (condition spéciale)
@@ -40,29 +220,213 @@ class ContentModerator:
                 }
             
             # Simulation d'analyse IA (remplacer par une vraie API en production)
-            result = await self._simulate_ai_analysis(image)
+            if getattr(image, "is_animated", False):
+                image.load()
+                analysis_start = time.perf_counter()
+                result = self._analyze_animation(image, decode_start)
+                decode_ms = (analysis_start - decode_start) * 1000
+                analysis_ms = (time.perf_counter() - analysis_start) * 1000
+            else:
+                result, decode_ms, analysis_ms = self._analyze_cascade(image, image_data, decode_start)
             
+            result["timings"] = {
+                "decode_ms": decode_ms,
+                "analysis_ms": analysis_ms
+            }
             return result
             
         except Exception as e:
-            return {
+            result = {
                 "safe": False,
                 "error": f"Erreur lors de l'analyse: {str(e)}",
                 "recommendation": "reject"
             }
+            # Données illisibles (format inconnu, fichier tronqué ou corrompu), à
+            # distinguer d'une panne de l'analyse (mémoire, processus de travail...)
+            if isinstance(e, self.INVALID_IMAGE_ERRORS):
+                result["invalid_image"] = True
+            return result
     
-    async def _simulate_ai_analysis(self, image: Image.Image) -> Dict:
+    def _analyze_cascade(self, image: Image.Image, image_data: bytes, decode_start: float):
+        """
+        Analyse une image fixe en deux étages: version réduite puis pleine résolution
+        
+        L'étage réduit décide seul lorsque ses scores sont hors de cascade_band;
+        sinon l'image est analysée en pleine résolution. Les heuristiques de
+        dimensions portent toujours sur la taille d'origine.
+        
+        Args:
+            image: Image PIL ouverte (pixels non encore décodés)
+            image_data: Données binaires de l'image (nouveau décodage réduit du JPEG)
+            decode_start: Instant (perf_counter) du début du décodage
+            
+        Returns:
+            Tuple: Résultat, temps de décodage et temps d'analyse (ms)
+        """
+        source_size = image.size
+        preview = self._decode_preview(image, image_data) if self.cascade_band else None
+        decode_ms = (time.perf_counter() - decode_start) * 1000
+        analysis_ms = 0.0
+        
+        preview_result = None
+        if preview is not None:
+            analysis_start = time.perf_counter()
+            preview_result = self._simulate_ai_analysis(preview, source_size)
+            analysis_ms += (time.perf_counter() - analysis_start) * 1000
+            if not self._is_borderline(preview_result):
+                preview_result["cascade"] = {
+                    "stage": "preview",
+                    "preview_size": list(preview.size)
+                }
+                return preview_result, decode_ms, analysis_ms
+        
+        full_decode_start = time.perf_counter()
+        image.load()
+        analysis_start = time.perf_counter()
+        result = self._simulate_ai_analysis(image)
+        decode_ms += (analysis_start - full_decode_start) * 1000
+        analysis_ms += (time.perf_counter() - analysis_start) * 1000
+        
+        result["cascade"] = {
+            "stage": "full",
+            "preview_size": list(preview.size) if preview is not None else None
+        }
+        if preview_result is not None:
+            result["cascade"]["preview_scores"] = {
+                "nudity": preview_result["nudity_score"],
+                "violence": preview_result["violence_score"]
+            }
+        return result, decode_ms, analysis_ms
+    
+    def _decode_preview(self, image: Image.Image, image_data: bytes) -> Optional[Image.Image]:
+        """
+        Décode une version réduite de l'image (plus grand côté proche de cascade_size)
+        
+        Le JPEG est décodé directement à échelle réduite (draft) sur un second
+        descripteur, l'image d'origine restant non décodée; les autres formats
+        sont décodés puis réduits par moyenne de blocs (reduce).
+        
+        Returns:
+            Optional[Image.Image]: Version réduite, ou None si l'image est déjà petite
+        """
+        width, height = image.size
+        factor = max(width, height) // self.cascade_size
+        if factor < 2:
+            return None
+        
+        if image.format == "JPEG":
+            preview = Image.open(io.BytesIO(image_data))
+            preview.draft("RGB", (width // factor, height // factor))
+        else:
+            preview = image
+        preview.load()
+        
+        factor = max(preview.size) // self.cascade_size
+        if factor >= 2:
+            if preview.mode not in self.REDUCIBLE_MODES:
+                preview = preview.convert("RGBA" if "transparency" in preview.info else "RGB")
+            preview = preview.reduce(factor)
+        return preview
+    
+    def _is_borderline(self, result: Dict) -> bool:
+        """Indique si un score de l'étage réduit tombe dans la bande d'incertitude"""
+        low, high = self.cascade_band
+        return any(low <= result[score] < high for score in ("nudity_score", "violence_score"))
+    
+    def _analyze_animation(self, image: Image.Image, start_time: float) -> Dict:
+        """
+        Analyse une image animée (GIF, WebP, APNG) sur un échantillon d'images
+        
+        Au plus max_animation_frames images régulièrement espacées sont visitées;
+        celles proches de la dernière image analysée à la fois par le dHash et par
+        la signature de couleur (une recoloration ne change pas le dHash) sont
+        ignorées comme appartenant à la même scène. L'analyse s'arrête dès qu'une image
+        est rejetée ou que animation_time_budget est épuisé.
+        
+        Args:
+            image: Image animée PIL
+            start_time: Instant (perf_counter) du début du décodage
+            
+        Returns:
+            Dict: Résultat de la pire image analysée, avec le détail de l'échantillonnage
+        """
+        frame_count = image.n_frames
+        sample_size = max(1, min(self.max_animation_frames, frame_count))
+        frame_indices = sorted(set(np.linspace(0, frame_count - 1, sample_size).round().astype(int).tolist()))
+        
+        worst_result = None
+        worst_frame = None
+        analyzed_frames = []
+        skipped_frames = 0
+        previous_frame = None
+        early_stop = False
+        budget_exhausted = False
+        
+        for frame_index in frame_indices:
+            if analyzed_frames and time.perf_counter() - start_time > self.animation_time_budget:
+                budget_exhausted = True
+                break
+            image.seek(frame_index)
+            
+            # Changement de scène: ignorer les images quasi identiques à la précédente,
+            # en forme comme en couleur
+            frame = (perceptual_hash(image), colour_signature(image))
+            if previous_frame is not None and self._same_scene(frame, previous_frame):
+                skipped_frames += 1
+                continue
+            previous_frame = frame
+            
+            frame_result = self._simulate_ai_analysis(image)
+            analyzed_frames.append(frame_index)
+            if worst_result is None or self._is_worse_result(frame_result, worst_result):
+                worst_result = frame_result
+                worst_frame = frame_index
+            if frame_result["recommendation"] == "reject":
+                early_stop = True
+                break
+        
+        worst_result["animation"] = {
+            "frame_count": frame_count,
+            "analyzed_frames": analyzed_frames,
+            "skipped_similar_frames": skipped_frames,
+            "decisive_frame": worst_frame,
+            "early_stop": early_stop,
+            "budget_exhausted": budget_exhausted
+        }
+        return worst_result
+    
+    def _same_scene(self, frame: Tuple[int, Tuple], previous: Tuple[int, Tuple]) -> bool:
+        """Compare deux images (dHash, signature de couleur) d'une animation"""
+        return (
+            bin(frame[0] ^ previous[0]).count("1") <= self.SCENE_CHANGE_DISTANCE and
+            colours_match(frame[1], previous[1])
+        )
+    
+    def _is_worse_result(self, candidate: Dict, current: Dict) -> bool:
+        """Compare deux résultats par gravité de recommandation puis par score de nudité"""
+        severity = self.RECOMMENDATION_SEVERITY
+        return (
+            (severity[candidate["recommendation"]], candidate["nudity_score"]) >
+            (severity[current["recommendation"]], current["nudity_score"])
+        )
+    
+    def _simulate_ai_analysis(self, image: Image.Image, source_size: Optional[Tuple[int, int]] = None) -> Dict:
         """
         Simulation d'analyse IA améliorée pour détecter la nudité
+        
+        source_size donne les dimensions d'origine lorsque image est une version réduite.
         """
         # Analyse basique des caractéristiques de l'image
-        width, height = image.size
-        pixels = np.array(image)
+        width, height = source_size or image.size
         
-        # Calculer des métriques basiques
-        skin_ratio = self._calculate_skin_ratio(pixels)
-        brightness = np.mean(pixels)
-        contrast = np.std(pixels)
+        # Calculer toutes les métriques de pixels en un seul passage, bande par bande
+        pixel_stats = self._compute_pixel_stats(
+            self._iter_image_strips(image),
+            grid_step=self._skin_grid_step(*image.size)
+        )
+        skin_ratio = self._calculate_skin_ratio(pixel_stats)
+        brightness = pixel_stats["brightness"]
+        contrast = pixel_stats["contrast"]
         
         # Heuristiques améliorées pour détecter du contenu potentiellement inapproprié
         nudity_score = 0.0
@@ -85,8 +449,9 @@ class ContentModerator:
         if width > 800 and height > 600:
             nudity_score += 0.1
         
-        # Analyse des zones de peau contiguës (simplifiée)
-        large_skin_areas = self._detect_large_skin_areas(pixels)
+        # Analyse des zones de peau contiguës
+        skin_regions = analyze_skin_regions(pixel_stats["skin_grid"])
+        large_skin_areas = self._detect_large_skin_areas(skin_regions)
         if large_skin_areas > 0.2:  # Plus de 20% de grandes zones de peau
             nudity_score += 0.3
         
@@ -99,13 +464,30 @@ class ContentModerator:
         nudity_score = min(1.0, max(0.0, nudity_score))
         violence_score = min(1.0, max(0.0, violence_score))
         
+        result = self._build_verdict(nudity_score, violence_score)
+        result["skin_regions"] = skin_regions
+        if self.classifier_input_size:
+            result["classifier_input"] = classifier_thumbnail(image, self.classifier_input_size)
+        return result
+    
+    def _build_verdict(self, nudity_score: float, violence_score: float) -> Dict:
+        """
+        Construit la décision (sûreté, raison, recommandation) à partir des scores
+        
+        Args:
+            nudity_score: Score de nudité (0-1)
+            violence_score: Score de violence (0-1)
+            
+        Returns:
+            Dict: Résultat de l'analyse
+        """
         # Rendre la détection plus stricte
-        is_safe = (nudity_score < 0.5 and  # Seuil plus bas pour la nudité
+        is_safe = (nudity_score < self.nudity_threshold and
                   violence_score < self.violence_threshold)
         
         # Générer une raison et recommandation
         if not is_safe:
-            if nudity_score >= 0.5:
+            if nudity_score >= self.nudity_threshold:
                 reason = f"Contenu inapproprié détecté - forte probabilité de nudité (score: {nudity_score:.2f})"
                 recommendation = "reject"
             elif violence_score >= self.violence_threshold:
@@ -122,97 +504,447 @@ class ContentModerator:
             "safe": is_safe,
             "nudity_score": nudity_score,
             "violence_score": violence_score,
-            "adult_content": nudity_score >= 0.5,
+            "adult_content": nudity_score >= self.nudity_threshold,
             "reason": reason,
             "recommendation": recommendation
         }
     
-    def _calculate_skin_ratio(self, pixels: np.ndarray) -> float:
+    async def _apply_classifier(self, result: Dict) -> Dict:
         """
-        Calcule le ratio de pixels de couleur peau dans l'image
+        Combine les scores du classifieur (micro-batché) avec ceux des heuristiques
         
         Args:
-            pixels: Tableau numpy des pixels de l'image
+            result: Résultat d'analyse, éventuellement porteur d'une vignette
             
         Returns:
-            float: Ratio de pixels de couleur peau (0-1)
+            Dict: Résultat avec scores combinés et décision recalculée
         """
-        # Plages de couleurs de peau (très simplifié)
-        # En RGB: peau typique a des valeurs R > 95, G > 40, B > 20
-        # et R > G, R > B
-        skin_mask = (
-            (pixels[:, :, 0] > 95) &  # Red
-            (pixels[:, :, 1] > 40) &  # Green  
-            (pixels[:, :, 2] > 20) &  # Blue
-            (pixels[:, :, 0] > pixels[:, :, 1]) &  # R > G
-            (pixels[:, :, 0] > pixels[:, :, 2])    # R > B
-        )
+        thumbnail = result.pop("classifier_input", None)
+        if self.classifier is None or thumbnail is None:
+            return result
         
-        total_pixels = pixels.shape[0] * pixels.shape[1]
-        skin_pixels = np.sum(skin_mask)
+        model_nudity, model_violence = await self.classifier.predict(thumbnail)
+        weight = self.classifier_weight
+        nudity_score = (1 - weight) * result["nudity_score"] + weight * model_nudity
+        violence_score = (1 - weight) * result["violence_score"] + weight * model_violence
         
-        return skin_pixels / total_pixels if total_pixels > 0 else 0.0
+        result["heuristic_scores"] = {"nudity": result["nudity_score"], "violence": result["violence_score"]}
+        result.update(self._build_verdict(nudity_score, violence_score))
+        result["classifier_scores"] = {"nudity": model_nudity, "violence": model_violence}
+        return result
+    
+    def _skin_grid_step(self, width: int, height: int) -> int:
+        """Pas de sous-échantillonnage du masque de peau pour l'étiquetage des zones"""
+        return max(1, -(-max(width, height) // self.SKIN_GRID_SIZE))
     
-    def _detect_large_skin_areas(self, pixels: np.ndarray) -> float:
+    def _iter_image_strips(self, image: Image.Image) -> Iterator[np.ndarray]:
         """
-        Détecte les grandes zones de peau contiguës
+        Parcourt l'image par bandes horizontales dont la mémoire de travail
+        respecte memory_budget, quelle que soit la taille de l'image
+        
+        Chaque bande est convertie en RGB puis découpée en blocs de lignes;
+        les statistiques accumulées sont identiques à celles de l'image entière.
+        
+        Args:
+            image: Image PIL (tout mode)
+            
+        Yields:
+            np.ndarray: Blocs de lignes RGB uint8 successifs
+        """
+        width, height = image.size
+        rows = max(1, self.memory_budget // max(1, width * self.STRIP_BYTES_PER_PIXEL))
+        if rows >= height and image.mode == "RGB":
+            yield from self._iter_row_blocks(np.asarray(image))
+            return
+        for top in range(0, height, rows):
+            strip = image.crop((0, top, width, min(height, top + rows)))
+            if strip.mode != "RGB":
+                strip = strip.convert("RGB")
+            yield from self._iter_row_blocks(np.asarray(strip))
+    
+    def _iter_row_blocks(self, pixels: np.ndarray) -> Iterator[np.ndarray]:
+        """
+        Découpe un tableau de pixels en blocs de lignes de taille bornée
+        
+        Args:
+            pixels: Tableau numpy RGB (hauteur, largeur, 3) en uint8
+            
+        Yields:
+            np.ndarray: Vues successives sur des bandes de lignes de l'image
+        """
+        height, width = pixels.shape[:2]
+        rows = max(1, self.PIXEL_BLOCK_SIZE // max(1, width))
+        for top in range(0, height, rows):
+            yield pixels[top:top + rows]
+    
+    def _compute_pixel_stats(self, blocks: Iterable[np.ndarray], grid_step: int = 1) -> Dict:
+        """
+        Calcule en un seul passage le masque de peau, la luminosité et le contraste
+        
+        Le masque de peau est construit bloc par bloc dans des tampons réutilisés
+        (opérations en place sur les canaux uint8), et l'histogramme des valeurs
+        des canaux est accumulé dans le même parcours pour en déduire la
+        moyenne et l'écart-type sans tableau temporaire en flottants.
         
         Args:
-            pixels: Tableau numpy des pixels de l'image
+            blocks: Bandes de lignes RGB uint8 couvrant l'image
+            grid_step: Pas d'échantillonnage de la grille de peau conservée
             
         Returns:
-            float: Ratio de grandes zones de peau (0-1)
-        """
-        # Détecter les pixels de peau
-        skin_mask = (
-            (pixels[:, :, 0] > 95) &  # Red
-            (pixels[:, :, 1] > 40) &  # Green  
-            (pixels[:, :, 2] > 20) &  # Blue
-            (pixels[:, :, 0] > pixels[:, :, 1]) &  # R > G
-            (pixels[:, :, 0] > pixels[:, :, 2])    # R > B
-        )
+            Dict: Nombre de pixels, pixels de peau, luminosité, contraste
+            et grille de peau sous-échantillonnée
+        """
+        histogram = np.zeros(256, dtype=np.int64)
+        total_pixels = 0
+        skin_pixels = 0
+        buffers = None
+        grid_rows = []
+        top = 0
         
-        # Simplification: compter les zones de peau adjacentes
-        # En pratique, on utiliserait une détection de composantes connexes
-        total_pixels = pixels.shape[0] * pixels.shape[1]
-        skin_pixels = np.sum(skin_mask)
+        for block in blocks:
+            block_shape = block.shape[:2]
+            if buffers is None or buffers[0].shape[0] < block_shape[0] or buffers[0].shape[1] != block_shape[1]:
+                buffers = (
+                    np.empty(block_shape, dtype=bool),
+                    np.empty(block_shape, dtype=bool),
+                    np.empty(block_shape, dtype=np.uint8)
+                )
+            rows = block_shape[0]
+            skin_mask = buffers[0][:rows]
+            scratch = buffers[1][:rows]
+            channel_max = buffers[2][:rows]
+            red, green, blue = block[:, :, 0], block[:, :, 1], block[:, :, 2]
+            
+            # Peau typique en RGB: R > 95, G > 40, B > 20, R > G et R > B
+            np.maximum(green, blue, out=channel_max)
+            np.greater(red, channel_max, out=skin_mask)
+            np.greater(red, 95, out=scratch)
+            skin_mask &= scratch
+            np.greater(green, 40, out=scratch)
+            skin_mask &= scratch
+            np.greater(blue, 20, out=scratch)
+            skin_mask &= scratch
+            
+            skin_pixels += int(np.count_nonzero(skin_mask))
+            total_pixels += rows * block_shape[1]
+            histogram += np.bincount(block.reshape(-1), minlength=256)
+            
+            # Conserver les lignes de la grille (alignées sur l'image entière)
+            grid_rows.append(skin_mask[(-top) % grid_step::grid_step, ::grid_step].copy())
+            top += rows
         
-        # Si beaucoup de pixels de peau, considérer qu'il y a de grandes zones
-        large_area_ratio = 0.0
-        if skin_pixels > total_pixels * 0.2:  # Plus de 20% de pixels de peau
-            large_area_ratio = min(1.0, skin_pixels / (total_pixels * 0.5))
+        # Moyenne et écart-type de toutes les valeurs de canaux à partir de l'histogramme
+        values_count = int(histogram.sum())
+        if values_count > 0:
+            brightness = float(np.dot(histogram, _CHANNEL_LEVELS)) / values_count
+            mean_square = float(np.dot(histogram, _CHANNEL_LEVELS_SQUARED)) / values_count
+            contrast = float(np.sqrt(max(0.0, mean_square - brightness * brightness)))
+        else:
+            brightness = 0.0
+            contrast = 0.0
         
-        return large_area_ratio
+        return {
+            "total_pixels": total_pixels,
+            "skin_pixels": skin_pixels,
+            "brightness": brightness,
+            "contrast": contrast,
+            "skin_grid": np.concatenate(grid_rows) if grid_rows else np.zeros((0, 0), dtype=bool)
+        }
     
-    async def batch_analyze(self, images_data: List[bytes]) -> List[Dict]:
+    def _calculate_skin_ratio(self, pixel_stats: Dict) -> float:
+        """
+        Calcule le ratio de pixels de couleur peau dans l'image
+        
+        Args:
+            pixel_stats: Statistiques de pixels calculées par _compute_pixel_stats
+            
+        Returns:
+            float: Ratio de pixels de couleur peau (0-1)
+        """
+        total_pixels = pixel_stats["total_pixels"]
+        skin_pixels = pixel_stats["skin_pixels"]
+        
+        return skin_pixels / total_pixels if total_pixels > 0 else 0.0
+    
+    def _detect_large_skin_areas(self, skin_regions: Dict) -> float:
+        """
+        Détecte les grandes zones de peau contiguës
+        
+        Args:
+            skin_regions: Zones de peau connexes calculées par analyze_skin_regions
+            
+        Returns:
+            float: Ratio de l'image couvert par de grandes zones de peau (0-1)
+        """
+        return min(1.0, skin_regions["large_area_ratio"])
+    
+    async def batch_analyze(self, images_data: List[bytes], workers: Optional[int] = None,
+                            timeout: Optional[float] = None) -> List[Dict]:
         """
         Analyse plusieurs images en batch
         
+        Les images sont réparties sur un pool de processus afin de ne pas bloquer
+        la boucle d'événements; les résultats sont renvoyés dans l'ordre d'entrée.
+        Une image refusée par le contrôle d'admission du décodage produit un
+        résultat d'erreur portant la clé "admission" (busy ou too_large).
+        
         Args:
             images_data: Liste des données binaires des images
+            workers: Nombre de processus (défaut: batch_workers, 0 = séquentiel)
+            timeout: Délai maximal par image en secondes, compté à partir du démarrage
+                de son analyse dans un processus (défaut: batch_timeout)
             
         Returns:
             List[Dict]: Liste des résultats d'analyse
         """
-        results = []
-        for image_data in images_data:
-            result = await self.analyze_image(image_data)
-            results.append(result)
+        workers = self.batch_workers if workers is None else workers
+        timeout = self.batch_timeout if timeout is None else timeout
+        
+        if workers <= 0:
+            results = []
+            for image_data in images_data:
+                try:
+                    result = await self.analyze_image(image_data)
+                except DecodeAdmissionError as e:
+                    result = self._admission_error(e)
+                    self.stats.record(result)
+                results.append(result)
+            
+            return results
+        
+        # Refuser les images trop grandes, puis servir les images déjà vues à
+        # l'identique avant de solliciter le pool (aucun décodage ici)
+        results: List[Optional[Dict]] = [None] * len(images_data)
+        costs = [0] * len(images_data)
+        digests = [None] * len(images_data)
+        cache_settings = self._verdict_settings() if self.verdict_cache is not None else None
+        for index, image_data in enumerate(images_data):
+            costs[index] = estimate_decoded_bytes(image_data)
+            try:
+                self.decode_admission.check_size(costs[index])
+            except DecodeAdmissionError as e:
+                results[index] = self._admission_error(e)
+                continue
+            if self.verdict_cache is not None:
+                results[index], digests[index] = self.verdict_cache.lookup_exact(image_data, cache_settings)
+        
+        pending = [index for index, result in enumerate(results) if result is None]
+        if pending:
+            loop = asyncio.get_running_loop()
+            settings = self._worker_settings()
+            tasks = [
+                self._run_in_worker(loop, workers, settings, images_data[index], costs[index],
+                                    digests[index], cache_settings, timeout)
+                for index in pending
+            ]
+            analyzed = await asyncio.gather(*tasks)
+            # Les vignettes de tout le batch rejoignent le même micro-batch du classifieur
+            classified = await asyncio.gather(*(self._apply_classifier(result) for result, _ in analyzed))
+            for index, result, (_, fingerprint) in zip(pending, classified, analyzed):
+                results[index] = result
+                if self.verdict_cache is not None:
+                    self.verdict_cache.store(fingerprint, result)
         
+        for result in results:
+            self.stats.record(result)
         return results
     
-    def get_moderation_stats(self) -> Dict:
+    async def _run_in_worker(self, loop: asyncio.AbstractEventLoop, workers: int,
+                             settings: Dict, image_data: bytes, cost: int, digest: Optional[str],
+                             cache_settings: Optional[str], timeout: Optional[float]) -> Tuple[Dict, Optional[Tuple]]:
         """
-        Retourne les statistiques de modération
+        Analyse une image dans le pool de processus avec un délai maximal
+        
+        Une fois le décodage admis, l'image est d'abord cherchée par empreinte
+        perceptuelle dans le cache des verdicts (si digest est fourni, avec
+        l'empreinte des paramètres cache_settings), le dHash et la signature de
+        couleur étant calculés dans un thread.
         
         Returns:
-            Dict: Statistiques d'utilisation
+            Tuple: Résultat de l'analyse (ou du cache, ou d'erreur si le délai est
+            dépassé ou si le décodage n'est pas admis) et empreinte pour store()
         """
-        # En production, ces données viendraient d'une base de données
+        try:
+            await self.decode_admission.acquire(cost)
+        except DecodeAdmissionError as e:
+            return self._admission_error(e), None
+        
+        # Un délai dépassé arrête les processus: le budget est rendu à la sortie
+        try:
+            fingerprint = None
+            if digest is not None:
+                # L'empreinte décode l'image: calculée hors de la boucle d'événements
+                image_hash = await loop.run_in_executor(None, image_fingerprint, image_data)
+                cached, fingerprint = self.verdict_cache.lookup_similar(digest, image_hash, cache_settings)
+                if cached is not None:
+                    return cached, None
+            
+            try:
+                result = await self._submit_to_pool(workers, settings, image_data, timeout)
+            except asyncio.TimeoutError:
+                result = {
+                    "safe": False,
+                    "error": f"Délai d'analyse dépassé ({timeout:.1f}s)",
+                    "recommendation": "review",
+                    "timeout": True
+                }
+            except Exception as e:
+                # Panne du pool (processus interrompu...): rien n'est établi sur l'image
+                result = {
+                    "safe": False,
+                    "error": f"Erreur lors de l'analyse: {str(e)}",
+                    "recommendation": "review"
+                }
+            return result, fingerprint
+        finally:
+            await self.decode_admission.release(cost)
+    
+    async def _submit_to_pool(self, workers: int, settings: Dict, image_data: bytes,
+                              timeout: Optional[float]) -> Dict:
+        """
+        Exécute une analyse dans le pool; le délai court à partir du démarrage
+        effectif de la tâche dans un processus
+        
+        Une tâche bloquée au-delà du délai fait remplacer le pool; les analyses
+        des autres images interrompues par ce remplacement sont resoumises au
+        nouveau pool.
+        
+        Raises:
+            asyncio.TimeoutError: Délai dépassé
+        """
+        while True:
+            pool = self._get_batch_pool(workers)
+            job_id, future = pool.submit(settings, image_data)
+            waiter = asyncio.wrap_future(future)
+            deadline = None
+            try:
+                while not waiter.done():
+                    if deadline is None and timeout is not None and job_id in pool.started:
+                        deadline = pool.started[job_id] + timeout
+                    if deadline is None:
+                        wait = self.BATCH_START_POLL if timeout is not None else None
+                    else:
+                        wait = deadline - time.monotonic()
+                        if wait <= 0:
+                            waiter.cancel()
+                            self._recycle_batch_pool(pool)
+                            raise asyncio.TimeoutError()
+                    await asyncio.wait({waiter}, timeout=wait)
+            finally:
+                pool.started.pop(job_id, None)
+            
+            if pool.recycled and (waiter.cancelled() or isinstance(waiter.exception(), BrokenProcessPool)):
+                continue
+            return waiter.result()
+    
+    def _admission_error(self, error: DecodeAdmissionError) -> Dict:
+        """Résultat d'une image refusée par le contrôle d'admission du décodage"""
+        return {
+            "safe": False,
+            "error": str(error),
+            "recommendation": "reject" if error.reason == "too_large" else "review",
+            "admission": error.reason
+        }
+    
+    def _get_batch_pool(self, workers: int) -> BatchWorkerPool:
+        """Crée (ou recrée si la taille change ou s'il est cassé) le pool de processus du batch"""
+        pool = self._batch_pool
+        if pool is None or pool.broken or pool.workers != workers:
+            if pool is not None and not pool.recycled:
+                pool.shutdown()
+            pool = BatchWorkerPool(workers)
+            self._batch_pool = pool
+        return pool
+    
+    def _recycle_batch_pool(self, pool: BatchWorkerPool):
+        """Arrête un pool dont une tâche est bloquée; le suivant sera créé à la demande"""
+        if self._batch_pool is pool:
+            self._batch_pool = None
+        if not pool.recycled:
+            pool.shutdown(terminate=True)
+    
+    def batch_worker_pids(self) -> List[int]:
+        """Identifiants des processus vivants du pool de batch (mesures mémoire)"""
+        if self._batch_pool is None:
+            return []
+        return [process.pid for process in (self._batch_pool.executor._processes or {}).values()]
+    
+    def _worker_settings(self) -> Dict:
+        """Paramètres transmis aux processus de travail pour reconstruire le modérateur"""
         return {
-            "total_analyzed": 0,
-            "blocked_images": 0,
-            "approved_images": 0,
-            "average_nudity_score": 0.0,
-            "average_violence_score": 0.0
+            "nudity_threshold": self.nudity_threshold,
+            "violence_threshold": self.violence_threshold,
+            "memory_budget": self.memory_budget,
+            "max_animation_frames": self.max_animation_frames,
+            "animation_time_budget": self.animation_time_budget,
+            "classifier_input_size": self.classifier_input_size,
+            "cascade_band": self.cascade_band,
+            "cascade_size": self.cascade_size
         }
+    
+    def _verdict_settings(self) -> str:
+        """
+        Empreinte des paramètres dont dépend un verdict (seuils, analyse, classifieur),
+        enregistrée avec chaque entrée du cache des verdicts
+        """
+        settings = self._worker_settings()
+        if self.classifier is not None:
+            model_path = getattr(self.classifier, "model_path", None)
+            settings["classifier"] = {
+                "backend": type(self.classifier).__name__,
+                "model_path": model_path,
+                "model_mtime": os.path.getmtime(model_path) if model_path and os.path.exists(model_path) else None,
+                "quantize": getattr(self.classifier, "quantize", None),
+                "weight": self.classifier_weight
+            }
+        payload = json.dumps(settings, sort_keys=True)
+        return hashlib.blake2b(payload.encode("utf-8"), digest_size=8).hexdigest()
+    
+    def shutdown(self):
+        """Arrête le pool de processus du batch et persiste le cache des verdicts"""
+        if self.verdict_cache is not None:
+            self.verdict_cache.save()
+        if self.classifier is not None:
+            self.classifier.close()
+        if self._batch_pool is not None:
+            self._batch_pool.shutdown()
+            self._batch_pool = None
+    
+    def get_moderation_stats(self) -> Dict:
+        """
+        Retourne les statistiques de modération
+        
+        Returns:
+            Dict: Statistiques d'utilisation (compteurs, moyennes, histogrammes
+            des scores et quantiles de latence de décodage et d'analyse)
+        """
+        stats = self.stats.snapshot()
+        if self.verdict_cache is not None:
+            stats["verdict_cache"] = self.verdict_cache.get_stats()
+        stats["decode_admission"] = self.decode_admission.get_stats()
+        return stats
+
+
+# Modérateur réutilisé par chaque processus de travail, indexé par ses paramètres
+_worker_moderator: Optional[ContentModerator] = None
+_worker_moderator_settings: Optional[Dict] = None
+# File de signalement des démarrages de tâches (BatchWorkerPool)
+_worker_started_queue = None
+
+def _init_batch_worker(started_queue):
+    """Initialisation d'un processus de BatchWorkerPool"""
+    global _worker_started_queue
+    _worker_started_queue = started_queue
+
+def _analyze_image_in_worker(settings: Dict, image_data: bytes, job_id: Optional[int] = None) -> Dict:
+    """Point d'entrée exécuté dans un processus du pool de batch"""
+    global _worker_moderator, _worker_moderator_settings
+    if job_id is not None and _worker_started_queue is not None:
+        _worker_started_queue.put(job_id)
+    if _worker_moderator is None or _worker_moderator_settings != settings:
+        moderator = ContentModerator(batch_workers=0, cache_size=0)
+        for name, value in settings.items():
+            setattr(moderator, name, value)
+        _worker_moderator = moderator
+        _worker_moderator_settings = settings
+    return _worker_moderator._analyze_image_bytes(image_data)
@@ -0,0 +1,172 @@
+import io
+import asyncio
+from collections import deque
+from contextlib import asynccontextmanager
+from PIL import Image
+from typing import Dict, Optional
+
+class DecodeAdmissionError(Exception):
+    """Décodage refusé par le contrôle d'admission"""
+    
+    status_code = 503
+    reason = "busy"
+
+class DecodeTooLargeError(DecodeAdmissionError):
+    """Image dont le décodage dépasse à lui seul le budget global"""
+    
+    status_code = 413
+    reason = "too_large"
+
+class DecodeBusyError(DecodeAdmissionError):
+    """Budget occupé: file d'attente pleine ou délai d'attente dépassé"""
+    
+    status_code = 503
+    reason = "busy"
+
+def estimate_decoded_bytes(image_data: bytes) -> int:
+    """
+    Estime la mémoire occupée par une image décodée en ne lisant que son en-tête
+    
+    PIL stocke 1 octet par pixel pour les modes L, P et 1, 2 pour I;16 et 4 pour
+    les autres modes (RGB compris). Les images animées sont décodées image par
+    image dans le même tampon.
+    
+    Args:
+        image_data: Données binaires de l'image
+    
+    Returns:
+        int: Taille décodée estimée en octets (taille des données si l'en-tête est illisible)
+    """
+    try:
+        image = Image.open(io.BytesIO(image_data))
+    except Exception:
+        # L'analyse échouera sans décoder de pixels
+        return len(image_data)
+    width, height = image.size
+    if image.mode in ("1", "L", "P"):
+        bytes_per_pixel = 1
+    elif image.mode.startswith("I;16"):
+        bytes_per_pixel = 2
+    else:
+        bytes_per_pixel = 4
+    return width * height * bytes_per_pixel
+
+class DecodeAdmissionController:
+    """
+    Budget global de mémoire de décodage partagé par toutes les analyses
+    
+    Une image n'est décodée que si la somme des tailles estimées des décodages
+    en cours laisse la place; sinon elle attend son tour (ordre d'arrivée, pour
+    ne pas affamer les grandes images) au plus queue_timeout secondes.
+    """
+    
+    def __init__(self, budget_bytes: int = 512 * 1024 * 1024, queue_timeout: float = 10.0,
+                 max_waiting: int = 256):
+        self.budget_bytes = budget_bytes
+        self.queue_timeout = queue_timeout
+        self.max_waiting = max_waiting
+        
+        self.in_use = 0
+        self._condition: Optional[asyncio.Condition] = None
+        self._waiters: deque = deque()
+        
+        self.metrics = {
+            "admitted": 0,
+            "queued": 0,
+            "rejected_busy": 0,
+            "rejected_too_large": 0,
+            "peak_in_use": 0
+        }
+    
+    def _get_condition(self) -> asyncio.Condition:
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        return self._condition
+    
+    async def acquire(self, cost: int, timeout: Optional[float] = None):
+        """
+        Réserve cost octets du budget, en attendant si nécessaire
+        
+        Args:
+            cost: Taille décodée estimée (estimate_decoded_bytes)
+            timeout: Attente maximale en secondes (défaut: queue_timeout)
+        
+        Raises:
+            DecodeTooLargeError: L'image dépasse le budget entier
+            DecodeBusyError: File pleine ou délai d'attente dépassé
+        """
+        self.check_size(cost)
+        
+        condition = self._get_condition()
+        timeout = self.queue_timeout if timeout is None else timeout
+        async with condition:
+            if not self._waiters and self.in_use + cost <= self.budget_bytes:
+                self._admit(cost)
+                return
+            if len(self._waiters) >= self.max_waiting:
+                self.metrics["rejected_busy"] += 1
+                raise DecodeBusyError("File de décodage pleine, réessayez plus tard")
+            
+            ticket = object()
+            self._waiters.append(ticket)
+            self.metrics["queued"] += 1
+            try:
+                await asyncio.wait_for(
+                    condition.wait_for(
+                        lambda: self._waiters[0] is ticket and self.in_use + cost <= self.budget_bytes
+                    ),
+                    timeout
+                )
+            except asyncio.TimeoutError:
+                self.metrics["rejected_busy"] += 1
+                raise DecodeBusyError(
+                    f"Budget de décodage saturé après {timeout:.1f}s d'attente, réessayez plus tard"
+                )
+            finally:
+                self._waiters.remove(ticket)
+                # La tête de file a pu changer: réveiller les suivants
+                condition.notify_all()
+            self._admit(cost)
+    
+    def check_size(self, cost: int):
+        """
+        Refuse d'emblée une image dont le décodage dépasse à lui seul le budget
+        
+        Raises:
+            DecodeTooLargeError: L'image dépasse le budget entier
+        """
+        if cost > self.budget_bytes:
+            self.metrics["rejected_too_large"] += 1
+            raise DecodeTooLargeError(
+                f"Image trop volumineuse à décoder ({cost / 1048576:.1f} Mo, "
+                f"budget {self.budget_bytes / 1048576:.1f} Mo)"
+            )
+    
+    def _admit(self, cost: int):
+        self.in_use += cost
+        self.metrics["admitted"] += 1
+        self.metrics["peak_in_use"] = max(self.metrics["peak_in_use"], self.in_use)
+    
+    async def release(self, cost: int):
+        """Libère cost octets du budget et réveille les décodages en attente"""
+        condition = self._get_condition()
+        async with condition:
+            self.in_use -= cost
+            condition.notify_all()
+    
+    @asynccontextmanager
+    async def admit(self, cost: int, timeout: Optional[float] = None):
+        """Réserve cost octets le temps du bloc with"""
+        await self.acquire(cost, timeout)
+        try:
+            yield
+        finally:
+            await self.release(cost)
+    
+    def get_stats(self) -> Dict:
+        return {
+            "budget_bytes": self.budget_bytes,
+            "in_use_bytes": self.in_use,
+            "waiting": len(self._waiters),
+            **self.metrics
+        }
@@ -1,13 +1,531 @@
 import asyncio
 import json
 import re
+import time
+import hashlib
+import unicodedata
+from collections import OrderedDict, deque
+from itertools import islice
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional, Tuple
 import numpy as np
-import pandas as pd
+
+# Patterns de ponctuation et de mise en forme suspects (ordre des pattern_matches)
+SUSPICIOUS_PATTERNS = [
+    r"!\s*!",
+    r"\?\s*\?",
+    r"[A-Z]{3,}",
+    r"\.{3,}",
+    r"\$+\s*\d+"
+]
+
+# Formes équivalentes compilées une fois: les répétitions sont déroulées pour
+# exposer un préfixe littéral au moteur d'expressions régulières, qui saute
+# alors directement aux occurrences possibles (une alternative unique des cinq
+# patterns serait plus lente pour la même raison)
+_SUSPICIOUS_PATTERN_RES = [
+    re.compile(r"!\s*!"),
+    re.compile(r"\?\s*\?"),
+    re.compile(r"[A-Z][A-Z][A-Z][A-Z]*"),
+    re.compile(r"\.\.\.\.*"),
+    re.compile(r"\$\$*\s*\d+")
+]
+
+# Comptage des majuscules: lettres ASCII supprimées en bloc sur l'UTF-8 (les
+# octets des caractères multi-octets sont tous >= 0x80), isupper() limité
+# aux seuls caractères non ASCII
+_ASCII_UPPERCASE = bytes(range(ord("A"), ord("Z") + 1))
+_NON_ASCII_RE = re.compile(r"[^\x00-\x7f]")
+
+def count_uppercase(content: str) -> int:
+    """Nombre de caractères de content pour lesquels isupper() est vrai"""
+    data = content.encode("utf-8", "surrogatepass")
+    count = len(data) - len(data.translate(None, _ASCII_UPPERCASE))
+    if not content.isascii():
+        count += sum(1 for char in _NON_ASCII_RE.findall(content) if char.isupper())
+    return count
+
+# Suffixes publics à plusieurs étiquettes: le domaine enregistrable garde une étiquette de plus
+MULTI_LABEL_SUFFIXES = {
+    "gouv.fr", "asso.fr", "co.uk", "org.uk", "ac.uk", "gov.uk", "com.au",
+    "net.au", "org.au", "co.nz", "co.za", "co.jp", "com.br", "com.cn"
+}
+
+# Formes reconnues dans unreliable_patterns: r".*\.tld$" et r".*mot.*"
+_SUFFIX_PATTERN_RE = re.compile(r"\.\*((?:\\\.[a-z0-9-]+)+)\$")
+_WORD_PATTERN_RE = re.compile(r"\.\*([a-z0-9-]+)\.\*")
+
+def parse_source(source: str) -> Tuple[str, bool]:
+    """
+    Extrait l'hôte normalisé d'une source (URL ou domaine nu)
+    
+    Args:
+        source: URL ou nom de domaine
+    
+    Returns:
+        Tuple[str, bool]: Hôte en minuscules (sans identifiants, port ni point final)
+        et présence du schéma https
+    """
+    domain = source.split("//")[-1].split("/")[0] if "//" in source else source.split("/")[0]
+    host = domain.rsplit("@", 1)[-1].split(":")[0].strip().lower().rstrip(".")
+    return host, source.startswith("https://")
+
+def normalize_content(content: str) -> str:
+    """Forme canonique d'un contenu (Unicode NFC, sans espaces en bordure)"""
+    return unicodedata.normalize("NFC", content).strip()
+
+def registrable_domain(host: str) -> str:
+    """Domaine enregistrable d'un hôte (ex: actu.lemonde.fr -> lemonde.fr)"""
+    labels = host.split(".")
+    if len(labels) <= 2:
+        return host
+    keep = 3 if ".".join(labels[-2:]) in MULTI_LABEL_SUFFIXES else 2
+    return ".".join(labels[-keep:])
+
+class BoundedCache:
+    """Cache LRU borné, avec expiration optionnelle des entrées (ttl en secondes)"""
+    
+    def __init__(self, max_entries: int = 10000, ttl: Optional[float] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[object, Tuple[float, object]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, key):
+        """Retourne la valeur en cache (ou None) et la marque comme récemment utilisée"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            stored_at, value = entry
+            if self.ttl is None or time.monotonic() - stored_at < self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._entries[key]
+        self.misses += 1
+        return None
+    
+    def put(self, key, value):
+        if self.max_entries <= 0:
+            return
+        self._entries[key] = (time.monotonic(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+    
+    def clear(self):
+        self._entries.clear()
+    
+    def get_stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
+
+class DomainIndex:
+    """
+    Index par suffixe des domaines fiables et suspects
+    
+    Un hôte est comparé à chacun de ses suffixes (actu.lemonde.fr, lemonde.fr, fr)
+    par consultation de dictionnaires: le coût dépend du nombre d'étiquettes de
+    l'hôte, pas de la taille des listes.
+    """
+    
+    def __init__(self, reliable_sources: List[str], unreliable_patterns: List[str]):
+        # Domaine fiable -> entrée d'origine; les entrées avec chemin restent des sous-chaînes
+        self.reliable_domains: Dict[str, str] = {}
+        self.reliable_substrings: List[str] = []
+        for reliable in reliable_sources:
+            if "/" in reliable:
+                self.reliable_substrings.append(reliable.lower())
+            else:
+                self.reliable_domains.setdefault(reliable.lower().strip("."), reliable)
+        
+        # Suffixe suspect (tld) -> pattern, mots suspects et expressions non reconnues
+        self.unreliable_suffixes: Dict[str, str] = {}
+        self.unreliable_words: List[Tuple[str, str]] = []
+        self.unreliable_regexes: List[Tuple["re.Pattern", str]] = []
+        for pattern in unreliable_patterns:
+            suffix = _SUFFIX_PATTERN_RE.fullmatch(pattern)
+            word = _WORD_PATTERN_RE.fullmatch(pattern)
+            if suffix:
+                self.unreliable_suffixes.setdefault(suffix.group(1).replace("\\.", ".")[1:], pattern)
+            elif word:
+                self.unreliable_words.append((word.group(1), pattern))
+            else:
+                self.unreliable_regexes.append((re.compile(pattern), pattern))
+    
+    def match_reliable_path(self, source_lower: str) -> Optional[str]:
+        """Entrée fiable avec chemin (ex: site.fr/rubrique) contenue dans la source"""
+        for reliable in self.reliable_substrings:
+            if reliable in source_lower:
+                return reliable
+        return None
+    
+    def lookup(self, host: str) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Classe un hôte: fiable ("high"), suspect ("low") ou inconnu (None)
+        
+        Args:
+            host: Hôte normalisé (parse_source)
+        
+        Returns:
+            Tuple: Fiabilité et entrée (domaine ou pattern) correspondante
+        """
+        labels = host.split(".")
+        suffixes = [".".join(labels[i:]) for i in range(len(labels))]
+        
+        for suffix in suffixes:
+            reliable = self.reliable_domains.get(suffix)
+            if reliable is not None:
+                return "high", reliable
+        
+        for suffix in suffixes:
+            pattern = self.unreliable_suffixes.get(suffix)
+            if pattern is not None:
+                return "low", pattern
+        for word, pattern in self.unreliable_words:
+            if word in host:
+                return "low", pattern
+        for regex, pattern in self.unreliable_regexes:
+            if regex.match(host):
+                return "low", pattern
+        return None, None
+
+# Coupures entre phrases: espaces suivant une ponctuation finale, sauf devant
+# ! ou ? (un pattern "!\s*!" ou "\?\s*\?" chevaucherait la coupure). Aucun
+# pattern suspect ne contient d'espace après une ponctuation finale: les
+# comptages des phrases s'additionnent exactement. La ponctuation fait partie
+# du motif (plutôt qu'une assertion arrière) pour que le moteur saute
+# directement aux candidats; seule la fin de la coupure est utilisée
+_SENTENCE_BOUNDARY_RE = re.compile(r"[.!?]\s+(?=[^\s!?])")
+
+# Mot-clé susceptible de chevaucher une coupure: espace initial, ou précédé
+# d'un espace ou d'une ponctuation finale
+_BOUNDARY_CROSSING_KEYWORD_RE = re.compile(r"(?:^|[.!?\s])\s")
+
+# Coupures entre paragraphes: ligne vide, sauf après $ ou devant ! et ? (les
+# patterns "\$+\s*\d+", "!\s*!" et "\?\s*\?" chevaucheraient la coupure);
+# ces deux conditions sont vérifiées par paragraph_ends
+_PARAGRAPH_BOUNDARY_RE = re.compile(r"\n[^\S\n]*\n\s*")
+
+def _crossing_keywords(keywords: List[str]) -> bool:
+    return any(_BOUNDARY_CROSSING_KEYWORD_RE.search(keyword) for keyword in keywords)
+
+def sentence_ends(content: str, keywords: List[str]) -> Iterator[int]:
+    """
+    Fins des phrases d'un texte, produites au fil de la lecture
+    
+    Les comptages des phrases s'additionnent exactement à ceux du texte: les
+    espaces de coupure restent à la fin de la phrase qui précède, et si un
+    mot-clé peut chevaucher une coupure, le texte forme une seule phrase.
+    
+    Args:
+        content: Texte à découper
+        keywords: Mots-clés recherchés (en minuscules)
+        
+    Returns:
+        Iterator[int]: Position de fin de chaque phrase (la dernière vaut len(content))
+    """
+    if not _crossing_keywords(keywords):
+        for boundary in _SENTENCE_BOUNDARY_RE.finditer(content):
+            yield boundary.end()
+    yield len(content)
+
+def paragraph_ends(content: str, keywords: List[str]) -> Iterator[int]:
+    """Fins des paragraphes d'un texte (mêmes garanties que sentence_ends)"""
+    if not _crossing_keywords(keywords):
+        length = len(content)
+        for boundary in _PARAGRAPH_BOUNDARY_RE.finditer(content):
+            end = boundary.end()
+            if end == length or content[end] in "!?":
+                continue
+            # Dernier caractère visible avant la ligne vide
+            before = boundary.start() - 1
+            while before >= 0 and content[before].isspace():
+                before -= 1
+            if before < 0 or content[before] == "$":
+                continue
+            yield end
+    yield len(content)
+
+class TextFeatures:
+    """Comptages bruts d'un texte, dont dérivent tous les indicateurs de _analyze_text"""
+    
+    def __init__(self, length: int = 0, uppercase_count: int = 0, exclamation_count: int = 0,
+                 question_count: int = 0, word_count: int = 0, period_count: int = 0,
+                 pattern_counts: Optional[List[int]] = None,
+                 keyword_positions: Optional[Dict[str, List[int]]] = None,
+                 lowered_length: Optional[int] = None):
+        self.length = length
+        self.uppercase_count = uppercase_count
+        self.exclamation_count = exclamation_count
+        self.question_count = question_count
+        self.word_count = word_count
+        self.period_count = period_count
+        self.pattern_counts = pattern_counts if pattern_counts is not None else [0] * len(SUSPICIOUS_PATTERNS)
+        self.keyword_positions = keyword_positions if keyword_positions is not None else {}
+        # Longueur du texte en minuscules, référentiel des positions des mots-clés
+        self.lowered_length = lowered_length if lowered_length is not None else length
+    
+    def extend(self, other: "TextFeatures"):
+        """
+        Ajoute les comptages d'un segment qui suit immédiatement ce texte
+        
+        Le résultat est celui du texte concaténé si aucun pattern ni mot-clé ne
+        chevauche la jonction (voir sentence_ends).
+        """
+        offset = self.lowered_length
+        self.length += other.length
+        self.uppercase_count += other.uppercase_count
+        self.exclamation_count += other.exclamation_count
+        self.question_count += other.question_count
+        self.word_count += other.word_count
+        self.period_count += other.period_count
+        self.pattern_counts = [a + b for a, b in zip(self.pattern_counts, other.pattern_counts)]
+        for keyword, positions in other.keyword_positions.items():
+            self.keyword_positions.setdefault(keyword, []).extend(position + offset for position in positions)
+        self.lowered_length += other.lowered_length
+
+class KeywordAutomaton:
+    """
+    Automate d'Aho-Corasick: recherche de tous les mots-clés en un seul passage
+    
+    Les liens d'échec sont résolus à la construction: chaque état ne conserve
+    que les transitions qui diffèrent de celles de la racine, si bien que la
+    recherche coûte au plus deux consultations de dictionnaire par caractère,
+    quel que soit le nombre de mots-clés, pour une mémoire proportionnelle au trie.
+    
+    Pour un petit lexique, une recherche str.find par mot-clé (en C) reste plus
+    rapide que le parcours caractère par caractère en Python: l'automate n'est
+    alors pas parcouru.
+    """
+    
+    # Taille de lexique à partir de laquelle l'automate bat les recherches str.find
+    DIRECT_SEARCH_MAX_KEYWORDS = 128
+    
+    def __init__(self, keywords: List[str]):
+        # Mots-clés distincts et non vides, dans l'ordre de la liste
+        self.keywords = list(dict.fromkeys(kw for kw in keywords if kw))
+        self.direct_search = len(self.keywords) <= self.DIRECT_SEARCH_MAX_KEYWORDS
+        
+        # Trie: transitions par état et mots-clés reconnus en fin d'état
+        goto: List[Dict[str, int]] = [{}]
+        outputs: List[List[int]] = [[]]
+        for index, keyword in enumerate(self.keywords):
+            state = 0
+            for char in keyword:
+                next_state = goto[state].get(char)
+                if next_state is None:
+                    next_state = len(goto)
+                    goto[state][char] = next_state
+                    goto.append({})
+                    outputs.append([])
+                state = next_state
+            outputs[state].append(index)
+        
+        # Parcours en largeur: liens d'échec, sorties héritées et transitions
+        # résolues (celles de l'état d'échec complétées par celles du trie)
+        self._root = goto[0]
+        self._delta: List[Dict[str, int]] = [{} for _ in goto]
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            outputs[state] = outputs[state] + outputs[fail[state]]
+            inherited = self._delta[fail[state]]
+            delta = dict(inherited) if inherited else {}
+            for char, next_state in goto[state].items():
+                fallback = inherited.get(char)
+                fail[next_state] = fallback if fallback is not None else self._root.get(char, 0)
+                delta[char] = next_state
+                queue.append(next_state)
+            self._delta[state] = delta
+        self._outputs = [tuple(output) for output in outputs]
+    
+    def find_all(self, text: str) -> Dict[str, List[int]]:
+        """
+        Trouve toutes les occurrences (chevauchantes comprises) des mots-clés
+        
+        Args:
+            text: Texte à parcourir (déjà normalisé, ex: en minuscules)
+        
+        Returns:
+            Dict[str, List[int]]: Positions de début de chaque mot-clé trouvé
+        """
+        if self.direct_search:
+            return self._find_all_direct(text)
+        
+        delta = self._delta
+        root = self._root
+        outputs = self._outputs
+        keywords = self.keywords
+        hits: Dict[str, List[int]] = {}
+        state = 0
+        for position, char in enumerate(text):
+            next_state = delta[state].get(char)
+            state = next_state if next_state is not None else root.get(char, 0)
+            if outputs[state]:
+                for index in outputs[state]:
+                    keyword = keywords[index]
+                    hits.setdefault(keyword, []).append(position - len(keyword) + 1)
+        return hits
+    
+    def _find_all_direct(self, text: str) -> Dict[str, List[int]]:
+        """Recherche chaque mot-clé avec str.find (mêmes résultats que l'automate)"""
+        hits: Dict[str, List[int]] = {}
+        for keyword in self.keywords:
+            position = text.find(keyword)
+            if position == -1:
+                continue
+            positions = hits[keyword] = []
+            while position != -1:
+                positions.append(position)
+                position = text.find(keyword, position + 1)
+        return hits
+
+# Mots des contenus pour les signatures MinHash (ponctuation et casse ignorées)
+_SHINGLE_WORD_RE = re.compile(r"\w+")
+_MINHASH_PRIME = (1 << 61) - 1
+
+class NearDuplicateIndex:
+    """
+    Index MinHash/LSH des contenus récemment analysés
+    
+    Un contenu est réduit à l'ensemble de ses suites de shingle_size mots, puis à
+    une signature MinHash de num_perm valeurs. Les signatures sont découpées en
+    bands bandes: deux contenus partageant une bande entière sont candidats, et
+    un candidat est retenu si la similarité de Jaccard estimée (part des valeurs
+    égales) atteint threshold. La recherche ne compare donc la signature qu'aux
+    quelques entrées des mêmes seaux.
+    
+    Les entrées expirent après ttl secondes; au-delà de max_entries, les plus
+    anciennes sont évincées.
+    """
+    
+    def __init__(self, threshold: float = 0.8, num_perm: int = 64, bands: int = 16,
+                 shingle_size: int = 3, min_words: int = 8, max_entries: int = 10000,
+                 ttl: Optional[float] = 3600.0, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("num_perm doit être un multiple de bands")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.shingle_size = shingle_size
+        self.min_words = min_words
+        self.max_entries = max_entries
+        self.ttl = ttl
+        
+        # Permutations h -> (a*h + b) mod p sur des empreintes de 32 bits (sans débordement sur 64 bits)
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, 1 << 31, size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, 1 << 31, size=num_perm, dtype=np.uint64)
+        
+        # Entrées par ordre d'insertion (donc d'ancienneté): id -> (date, signature, seaux, valeur)
+        self._entries: "OrderedDict[int, Tuple[float, np.ndarray, List[Tuple[int, bytes]], object]]" = OrderedDict()
+        self._buckets: Dict[Tuple[int, bytes], set] = {}
+        self._next_id = 0
+        self.hits = 0
+        self.misses = 0
+    
+    def signature(self, content: str) -> Optional[np.ndarray]:
+        """Signature MinHash du contenu (None s'il est trop court pour être comparé)"""
+        words = _SHINGLE_WORD_RE.findall(content.lower())
+        if len(words) < self.min_words:
+            return None
+        size = self.shingle_size
+        shingles = {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+        hashes = np.fromiter((hash(shingle) & 0xFFFFFFFF for shingle in shingles), dtype=np.uint64, count=len(shingles))
+        values = (np.outer(hashes, self._a) + self._b) % _MINHASH_PRIME
+        return (values.min(axis=0) & 0xFFFFFFFF).astype(np.uint32)
+    
+    def _band_keys(self, signature: np.ndarray) -> List[Tuple[int, bytes]]:
+        raw = signature.tobytes()
+        step = len(raw) // self.bands
+        return [(band, raw[band * step:(band + 1) * step]) for band in range(self.bands)]
+    
+    def query(self, signature: np.ndarray) -> Optional[Tuple[float, object]]:
+        """
+        Cherche le contenu indexé le plus semblable
+        
+        Returns:
+            Optional[Tuple[float, object]]: (similarité estimée, valeur) ou None sous le seuil
+        """
+        self._expire()
+        candidates = set()
+        for key in self._band_keys(signature):
+            ids = self._buckets.get(key)
+            if ids:
+                candidates.update(ids)
+        
+        best = None
+        for entry_id in candidates:
+            _, stored, _, value = self._entries[entry_id]
+            similarity = int(np.count_nonzero(stored == signature)) / self.num_perm
+            if similarity >= self.threshold and (best is None or similarity > best[0]):
+                best = (similarity, value)
+        
+        if best is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return best
+    
+    def add(self, signature: np.ndarray, value):
+        """Indexe une signature et la valeur à transmettre à ses quasi-doublons"""
+        self._expire()
+        entry_id = self._next_id
+        self._next_id += 1
+        keys = self._band_keys(signature)
+        self._entries[entry_id] = (time.monotonic(), signature, keys, value)
+        for key in keys:
+            self._buckets.setdefault(key, set()).add(entry_id)
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+    
+    def _expire(self):
+        if self.ttl is None:
+            return
+        deadline = time.monotonic() - self.ttl
+        while self._entries:
+            entry_id = next(iter(self._entries))
+            if self._entries[entry_id][0] >= deadline:
+                break
+            self._remove(entry_id)
+    
+    def _remove(self, entry_id: int):
+        _, _, keys, _ = self._entries.pop(entry_id)
+        for key in keys:
+            ids = self._buckets[key]
+            ids.discard(entry_id)
+            if not ids:
+                del self._buckets[key]
+    
+    def clear(self):
+        self._entries.clear()
+        self._buckets.clear()
+    
+    def get_stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "buckets": len(self._buckets),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
 
 class FakeNewsDetector:
-    def __init__(self):
+    # Taille des blocs de analyze_batch (scores calculés en colonnes par bloc)
+    BATCH_CHUNK_SIZE = 4096
+    
+    def __init__(self, result_cache_size: int = 10000, result_cache_ttl: float = 300.0,
+                 near_duplicate_threshold: Optional[float] = 0.8, near_duplicate_ttl: float = 3600.0,
+                 classifier=None, classifier_weight: float = 0.3, post_cache_size: int = 10000,
+                 reputation=None):
         self.suspicious_keywords = [
             "gratuit", "miracle", "garanti", "immédiat", "secret", "révolutionnaire",
             "100%", "jamais vu", "incroyable", "étonnant", "choc", "alerte",
@@ -33,53 +551,291 @@ class FakeNewsDetector:
             "fake_detected": 0,
             "suspicious_detected": 0,
             "reliable_detected": 0,
+            "cache_hits": 0,
+            "near_duplicate_hits": 0,
+            "paragraphs_reused": 0,
+            "paragraphs_analyzed": 0,
             "analysis_times": []
         }
+        
+        # Cache des résultats par empreinte (contenu normalisé, source): un même
+        # contenu viral soumis à plusieurs reprises n'est analysé qu'une fois par ttl
+        self.result_cache = BoundedCache(max_entries=result_cache_size, ttl=result_cache_ttl)
+        
+        # Index MinHash/LSH des contenus récents: une republication retouchée
+        # (ligne ajoutée, ponctuation modifiée) hérite de l'analyse du texte
+        # d'origine (None si near_duplicate_threshold est None)
+        self.near_duplicates: Optional[NearDuplicateIndex] = None
+        if near_duplicate_threshold is not None:
+            self.near_duplicates = NearDuplicateIndex(
+                threshold=near_duplicate_threshold,
+                max_entries=result_cache_size,
+                ttl=near_duplicate_ttl
+            )
+        
+        # Automate des mots-clés suspects, recompilé si la liste est modifiée
+        self._keyword_automaton: Optional[KeywordAutomaton] = None
+        self._keyword_snapshot: Optional[List[str]] = None
+        
+        # Index des domaines et cache LRU des verdicts par source, reconstruits
+        # si reliable_sources ou unreliable_patterns sont modifiés
+        self._domain_index: Optional[DomainIndex] = None
+        self._domain_snapshot: Optional[Tuple[List[str], List[str]]] = None
+        self.source_cache = BoundedCache(max_entries=4096)
+        
+        # Backend statistique optionnel (text_classifier.HashingTextClassifier):
+        # son score est mélangé à celui des règles dans _calculate_risk_score
+        self.classifier = classifier
+        self.classifier_weight = classifier_weight
+        
+        # Comptages par paragraphe de la dernière version de chaque publication
+        # (post_id -> (automate des mots-clés, {texte du paragraphe: TextFeatures})):
+        # une publication modifiée ne réanalyse que ses paragraphes changés
+        self.post_paragraphs = BoundedCache(max_entries=post_cache_size)
+        
+        # Table de réputation apprise optionnelle (source_reputation.SourceReputationTable):
+        # compteurs par domaine alimentés par chaque analyse et chaque signalement,
+        # d'où est dérivé le trust_score (la liste statique n'en est que l'a priori)
+        self.reputation = reputation
+    
+    def _get_keyword_automaton(self) -> KeywordAutomaton:
+        """Retourne l'automate des mots-clés, recompilé si suspicious_keywords a changé"""
+        if self._keyword_automaton is None or self._keyword_snapshot != self.suspicious_keywords:
+            self._keyword_snapshot = list(self.suspicious_keywords)
+            self._keyword_automaton = KeywordAutomaton(self._keyword_snapshot)
+        return self._keyword_automaton
     
-    async def analyze_content(self, content: str, source: Optional[str] = None, metadata: Optional[Dict] = None) -> Dict:
-        """Analyse un contenu pour détecter les fake news"""
+    def _get_domain_index(self) -> DomainIndex:
+        """Retourne l'index des domaines, reconstruit (et le cache vidé) si les listes ont changé"""
+        snapshot = (self.reliable_sources, self.unreliable_patterns)
+        if self._domain_index is None or self._domain_snapshot != snapshot:
+            self._domain_snapshot = (list(self.reliable_sources), list(self.unreliable_patterns))
+            self._domain_index = DomainIndex(*self._domain_snapshot)
+            self.source_cache.clear()
+        return self._domain_index
+    
+    async def analyze_content(self, content: str, source: Optional[str] = None, metadata: Optional[Dict] = None,
+                              early_exit: bool = False, post_id: Optional[str] = None) -> Dict:
+        """
+        Analyse un contenu pour détecter les fake news
+        
+        Args:
+            content: Texte à analyser
+            source: URL ou domaine de la source
+            metadata: Métadonnées (non utilisées)
+            early_exit: Scorer phrase par phrase et s'arrêter dès que le statut
+                "fake" est acquis (voir _analyze_text_incremental)
+            post_id: Identifiant de la publication: seuls les paragraphes modifiés
+                depuis sa dernière analyse sont réanalysés (early_exit est alors ignoré)
+            
+        Returns:
+            Dict: Résultat de l'analyse
+        """
         start_time = datetime.now()
         
         try:
-            self.metrics["total_analyzed"] += 1
-            
-            # Analyse du contenu
-            content_analysis = self._analyze_text(content)
-            
-            # Analyse de la source
-            source_analysis = self._analyze_source(source) if source else {"reliability": "unknown"}
-            
-            # Calcul du score global
-            risk_score = self._calculate_risk_score(content_analysis, source_analysis)
+            content = normalize_content(content)
+            if post_id is not None:
+                early_exit = False
+            cache_key = self._result_cache_key(content, source, early_exit)
+            cached = self.result_cache.get(cache_key)
+            if cached is not None:
+                # Résultat déjà calculé: seules les métriques sont mises à jour
+                self.metrics["cache_hits"] += 1
+                self._record_analysis(cached["status"], start_time)
+                result = {**cached, "cache_hit": True, "timestamp": datetime.now().isoformat()}
+                if post_id is not None:
+                    # Le cache est partagé entre publications: les comptages par
+                    # paragraphe de celle-ci restent à jour pour sa prochaine version
+                    result["incremental"] = self._update_post_features(post_id, content)[1]
+                return result
             
-            # Détermination du statut
-            status = self._determine_status(risk_score)
-            
-            # Génération des recommandations
-            recommendations = self._generate_recommendations(content_analysis, source_analysis, risk_score)
-            
-            # Mise à jour des métriques
-            if status == "fake":
-                self.metrics["fake_detected"] += 1
-            elif status == "suspicious":
-                self.metrics["suspicious_detected"] += 1
-            elif status == "reliable":
-                self.metrics["reliable_detected"] += 1
-            
-            analysis_time = (datetime.now() - start_time).total_seconds()
-            self.metrics["analysis_times"].append(analysis_time)
+            # Les métadonnées propres à une publication ne sont pas mises en cache
+            incremental = None
+            if post_id is not None:
+                result, incremental = self._analyze_post(post_id, content, source)
+            else:
+                result = self._analyze_fresh(content, source, early_exit)
+            self.result_cache.put(cache_key, result)
+            self._learn_source(result)
+            self._record_analysis(result["status"], start_time)
+            if incremental is not None:
+                return {**result, "cache_hit": False, "incremental": incremental}
+            return {**result, "cache_hit": False}
             
+        except Exception as e:
+            self.metrics["total_analyzed"] += 1
             return {
-                "status": status,
-                "risk_score": risk_score,
-                "confidence": min(0.95, 0.5 + abs(risk_score - 0.5)),
-                "content_analysis": content_analysis,
-                "source_analysis": source_analysis,
-                "recommendations": recommendations,
-                "keywords_found": content_analysis["suspicious_keywords"],
+                "status": "error",
+                "error": str(e),
                 "timestamp": datetime.now().isoformat()
             }
+    
+    async def analyze_batch(self, items: List[Dict]) -> List[Dict]:
+        """
+        Analyse un lot de contenus
+        
+        Les comptages sont extraits élément par élément, puis les scores de tout
+        un bloc sont calculés en colonnes NumPy. Chaque élément reçoit le même
+        résultat que par analyze_content (cache compris), à ceci près que les
+        quasi-doublons ne sont cherchés que parmi les contenus des blocs
+        précédents, et que la réputation apprise des sources n'est relue qu'au
+        bloc suivant; la boucle d'événements est rendue entre deux blocs de
+        BATCH_CHUNK_SIZE éléments.
+        
+        Args:
+            items: Éléments {"content", "source", "metadata"}
             
+        Returns:
+            List[Dict]: Résultats, dans l'ordre des éléments
+        """
+        results = []
+        for offset in range(0, len(items), self.BATCH_CHUNK_SIZE):
+            if offset:
+                await asyncio.sleep(0)
+            results.extend(self._analyze_chunk(items[offset:offset + self.BATCH_CHUNK_SIZE]))
+        return results
+    
+    def _analyze_chunk(self, items: List[Dict]) -> List[Dict]:
+        """Analyse un bloc du lot (voir analyze_batch)"""
+        start_time = datetime.now()
+        results: List[Optional[Dict]] = [None] * len(items)
+        statuses: List[Tuple[int, str]] = []
+        
+        # Éléments à calculer: un seul calcul par empreinte, les doublons du
+        # bloc sont servis ensuite comme des succès de cache
+        indices_by_key: Dict[str, List[int]] = {}
+        rows: List[Tuple[str, str, TextFeatures, Dict, Optional[np.ndarray]]] = []
+        for index, item in enumerate(items):
+            try:
+                content = normalize_content(item["content"])
+                source = item.get("source")
+                cache_key = self._result_cache_key(content, source)
+                if cache_key in indices_by_key:
+                    indices_by_key[cache_key].append(index)
+                    continue
+                
+                cached = self.result_cache.get(cache_key)
+                if cached is not None:
+                    self.metrics["cache_hits"] += 1
+                    results[index] = {**cached, "cache_hit": True, "timestamp": datetime.now().isoformat()}
+                    statuses.append((index, cached["status"]))
+                    continue
+                
+                signature = self.near_duplicates.signature(content) if self.near_duplicates is not None else None
+                inherited = self._inherit_near_duplicate(signature, source) if signature is not None else None
+                if inherited is not None:
+                    self.result_cache.put(cache_key, inherited)
+                    self._learn_source(inherited)
+                    indices_by_key[cache_key] = [index]
+                    results[index] = {**inherited, "cache_hit": False}
+                    statuses.append((index, inherited["status"]))
+                    continue
+                
+                features = self._extract_text_features(content)
+                source_analysis = self._analyze_source(source) if source else {"reliability": "unknown"}
+            except Exception as e:
+                self.metrics["total_analyzed"] += 1
+                results[index] = {
+                    "status": "error",
+                    "error": str(e),
+                    "timestamp": datetime.now().isoformat()
+                }
+                continue
+            indices_by_key[cache_key] = [index]
+            rows.append((cache_key, content, features, source_analysis, signature))
+        
+        if rows:
+            try:
+                row_results = self._score_rows(rows)
+            except Exception:
+                # Échec du calcul en colonnes (ex: prédiction du modèle sur tout le
+                # bloc): chaque élément est repris seul, seul l'élément fautif échoue
+                row_results = [self._score_row(content, source_analysis) for _, content, _, source_analysis, _ in rows]
+            
+            for (cache_key, _, _, _, signature), result in zip(rows, row_results):
+                first, *duplicates = indices_by_key[cache_key]
+                if result["status"] == "error":
+                    for index in (first, *duplicates):
+                        self.metrics["total_analyzed"] += 1
+                        results[index] = result
+                    continue
+                
+                self.result_cache.put(cache_key, result)
+                self._learn_source(result)
+                if signature is not None:
+                    self.near_duplicates.add(signature, result["content_analysis"])
+                
+                results[first] = {**result, "cache_hit": False}
+                statuses.append((first, result["status"]))
+                for index in duplicates:
+                    self.metrics["cache_hits"] += 1
+                    results[index] = {**result, "cache_hit": True}
+                    statuses.append((index, result["status"]))
+        
+        # Le temps du bloc est réparti entre les éléments servis
+        for _, status in statuses:
+            self._record_analysis(status, start_time, share=len(statuses))
+        return results
+    
+    def _score_rows(self, rows: List[Tuple[str, str, TextFeatures, Dict, Optional[np.ndarray]]]) -> List[Dict]:
+        """Résultats des éléments calculés d'un bloc, scores en colonnes NumPy (voir _analyze_chunk)"""
+        timestamp = datetime.now().isoformat()
+        details = [self._match_details(features) for _, _, features, _, _ in rows]
+        # Score du modèle statistique: une seule prédiction creuse pour tout le bloc
+        model_scores = None
+        if self.classifier is not None:
+            model_scores = self.classifier.predict_batch([content for _, content, _, _, _ in rows])
+        scores = self._score_columns(
+            [features for _, _, features, _, _ in rows],
+            [len(found_keywords) for found_keywords, _, _ in details],
+            [len(pattern_matches) for _, _, pattern_matches in details],
+            [source_analysis.get("trust_score", 0.5) for _, _, _, source_analysis, _ in rows],
+            model_scores
+        )
+        
+        row_results = []
+        for row, ((_, content, features, source_analysis, _), (found_keywords, keyword_hits, pattern_matches)) in enumerate(zip(rows, details)):
+            try:
+                # Mêmes types que l'analyse unitaire pour les cas limites (0 entier)
+                if features.length:
+                    uppercase_ratio = scores["uppercase_ratio"][row]
+                    keyword_density = scores["keyword_density"][row]
+                    readability_score = scores["readability_score"][row]
+                    if readability_score <= 0:
+                        readability_score = 0
+                else:
+                    uppercase_ratio = keyword_density = 0
+                    readability_score = 0.0
+                
+                content_analysis = self._build_content_analysis(
+                    features, found_keywords, keyword_hits, pattern_matches,
+                    uppercase_ratio, keyword_density, scores["suspicion_score"][row], readability_score
+                )
+                if model_scores is not None:
+                    content_analysis["model_score"] = model_scores[row]
+                risk_score = scores["risk_score"][row]
+                row_results.append({
+                    "status": scores["status"][row],
+                    "risk_score": risk_score,
+                    "confidence": scores["confidence"][row],
+                    "content_analysis": content_analysis,
+                    "source_analysis": source_analysis,
+                    "recommendations": self._generate_recommendations(content_analysis, source_analysis, risk_score),
+                    "keywords_found": found_keywords,
+                    "timestamp": timestamp
+                })
+            except Exception:
+                row_results.append(self._score_row(content, source_analysis))
+        return row_results
+    
+    def _score_row(self, content: str, source_analysis: Dict) -> Dict:
+        """Résultat d'un seul élément d'un bloc (repli de _score_rows), ou résultat d'erreur"""
+        try:
+            content_analysis = self._analyze_text(content)
+            if self.classifier is not None:
+                content_analysis["model_score"] = self.classifier.predict_batch([content])[0]
+            return self._build_result(content_analysis, source_analysis)
         except Exception as e:
             return {
                 "status": "error",
@@ -87,51 +843,383 @@ class FakeNewsDetector:
                 "timestamp": datetime.now().isoformat()
             }
     
-    def _analyze_text(self, content: str) -> Dict:
-        """Analyse le texte du contenu"""
-        content_lower = content.lower()
+    def _score_columns(self, features: List[TextFeatures], keyword_counts: List[int],
+                       pattern_counts: List[int], trust_scores: List[float],
+                       model_scores: Optional[List[float]] = None) -> Dict[str, list]:
+        """
+        Calcule en colonnes les scores d'un bloc (mêmes opérations, dans le même
+        ordre, que _summarize_text_features, _calculate_risk_score et _determine_status)
         
-        # Recherche de mots-clés suspects
-        found_keywords = [kw for kw in self.suspicious_keywords if kw in content_lower]
+        Returns:
+            Dict[str, list]: Une liste de valeurs Python par score
+        """
+        count = len(features)
+        length = np.fromiter((f.length for f in features), dtype=np.float64, count=count)
+        uppercase = np.fromiter((f.uppercase_count for f in features), dtype=np.float64, count=count)
+        exclamation = np.fromiter((f.exclamation_count for f in features), dtype=np.float64, count=count)
+        words = np.fromiter((f.word_count for f in features), dtype=np.float64, count=count)
+        sentences = np.fromiter((f.period_count + 1 for f in features), dtype=np.float64, count=count)
+        keywords = np.asarray(keyword_counts, dtype=np.float64)
+        patterns = np.asarray(pattern_counts, dtype=np.float64)
+        trust = np.asarray(trust_scores, dtype=np.float64)
         
-        # Analyse des caractéristiques du texte
-        text_features = {
-            "length": len(content),
-            "exclamation_count": content.count("!"),
-            "question_count": content.count("?"),
-            "uppercase_ratio": sum(1 for c in content if c.isupper()) / len(content) if content else 0,
-            "suspicious_keywords": found_keywords,
-            "keyword_density": len(found_keywords) / len(content.split()) if content else 0
+        has_text = length > 0
+        uppercase_ratio = np.divide(uppercase, length, out=np.zeros(count), where=has_text)
+        keyword_density = np.divide(keywords, words, out=np.zeros(count), where=has_text & (words > 0))
+        
+        suspicion_score = np.minimum(
+            1.0,
+            keyword_density * 0.3 + exclamation * 0.1 + uppercase_ratio * 0.2 + patterns * 0.15
+        )
+        readability_score = np.where(
+            has_text,
+            np.minimum(1.0, np.maximum(0.0, 1 - (words / sentences - 15) / 30)),
+            0.0
+        )
+        
+        content_risk = suspicion_score
+        if model_scores is not None:
+            weight = self.classifier_weight
+            content_risk = (1 - weight) * suspicion_score + weight * np.asarray(model_scores, dtype=np.float64)
+        risk_score = np.minimum(1.0, np.maximum(0.0, content_risk * 0.6 + (1 - trust) * 0.4))
+        confidence = np.minimum(0.95, 0.5 + np.abs(risk_score - 0.5))
+        status = np.select(
+            [risk_score >= 0.8, risk_score >= 0.6, risk_score >= 0.3],
+            ["fake", "suspicious", "questionable"],
+            "reliable"
+        )
+        
+        return {
+            "uppercase_ratio": uppercase_ratio.tolist(),
+            "keyword_density": keyword_density.tolist(),
+            "suspicion_score": suspicion_score.tolist(),
+            "readability_score": readability_score.tolist(),
+            "risk_score": risk_score.tolist(),
+            "confidence": confidence.tolist(),
+            "status": status.tolist()
         }
+    
+    def _result_cache_key(self, content: str, source: Optional[str], early_exit: bool = False) -> str:
+        """Empreinte du couple (contenu normalisé, source), distincte pour les analyses à sortie anticipée"""
+        digest = hashlib.blake2b(content.encode("utf-8", "surrogatepass"), digest_size=16)
+        digest.update(b"\0" + (source or "").strip().encode("utf-8", "surrogatepass"))
+        if early_exit:
+            digest.update(b"\0early_exit")
+        return digest.hexdigest()
+    
+    def _record_analysis(self, status: str, start_time: datetime, share: int = 1):
+        """Met à jour les métriques pour une analyse servie (calculée ou en cache)"""
+        self.metrics["total_analyzed"] += 1
+        if status == "fake":
+            self.metrics["fake_detected"] += 1
+        elif status == "suspicious":
+            self.metrics["suspicious_detected"] += 1
+        elif status == "reliable":
+            self.metrics["reliable_detected"] += 1
         
-        # Détection de patterns suspects
-        suspicious_patterns = [
-            r"!\s*!",
-            r"\?\s*\?",
-            r"[A-Z]{3,}",
-            r"\.{3,}",
-            r"\$+\s*\d+"
-        ]
+        analysis_time = (datetime.now() - start_time).total_seconds() / share
+        self.metrics["analysis_times"].append(analysis_time)
+    
+    def _analyze_fresh(self, content: str, source: Optional[str], early_exit: bool = False) -> Dict:
+        """Analyse hors cache exact: héritage d'un quasi-doublon récent, sinon analyse complète"""
+        signature = self.near_duplicates.signature(content) if self.near_duplicates is not None else None
+        if signature is not None:
+            inherited = self._inherit_near_duplicate(signature, source)
+            if inherited is not None:
+                return inherited
+        
+        result = self._analyze_uncached(content, source, early_exit)
+        # Une analyse interrompue ne couvre pas tout le texte: elle n'est pas transmise
+        if signature is not None and not result["content_analysis"].get("sentence_scoring", {}).get("early_exit"):
+            self.near_duplicates.add(signature, result["content_analysis"])
+        return result
+    
+    def _analyze_post(self, post_id: str, content: str, source: Optional[str]) -> Tuple[Dict, Dict]:
+        """
+        Réanalyse d'une publication à partir des comptages de ses paragraphes
+        
+        Les paragraphes inchangés depuis la dernière analyse de post_id reprennent
+        leurs comptages en cache; les autres sont extraits. Les comptages se
+        recombinent exactement (voir paragraph_ends): le résultat est celui d'une
+        analyse complète. La recherche de quasi-doublons est sautée, une version
+        modifiée d'une publication lui étant par nature semblable.
+        
+        Returns:
+            Tuple[Dict, Dict]: Résultat (indépendant de post_id) et métadonnées de
+            la réanalyse incrémentale
+        """
+        features, incremental = self._update_post_features(post_id, content)
+        content_analysis = self._summarize_text_features(features)
+        if self.classifier is not None:
+            content_analysis["model_score"] = self.classifier.predict_batch([content])[0]
+        source_analysis = self._analyze_source(source) if source else {"reliability": "unknown"}
+        result = self._build_result(content_analysis, source_analysis)
+        
+        if self.near_duplicates is not None:
+            signature = self.near_duplicates.signature(content)
+            if signature is not None:
+                self.near_duplicates.add(signature, content_analysis)
+        return result, incremental
+    
+    def _update_post_features(self, post_id: str, content: str) -> Tuple[TextFeatures, Dict]:
+        """
+        Comptages du texte d'une publication, paragraphe par paragraphe, en
+        reprenant ceux des paragraphes inchangés depuis sa dernière version
+        
+        Returns:
+            Tuple[TextFeatures, Dict]: Comptages du texte entier et métadonnées
+            (post_id, paragraphes, paragraphes repris)
+        """
+        automaton = self._get_keyword_automaton()
+        previous = self.post_paragraphs.get(post_id)
+        # Comptages obtenus avec une autre liste de mots-clés: inutilisables
+        known = previous[1] if previous is not None and previous[0] is automaton else {}
+        
+        features = TextFeatures()
+        paragraphs: Dict[str, TextFeatures] = {}
+        count = 0
+        analyzed = 0
+        start = 0
+        for end in paragraph_ends(content, automaton.keywords):
+            paragraph = content[start:end]
+            start = end
+            paragraph_features = paragraphs.get(paragraph) or known.get(paragraph)
+            if paragraph_features is None:
+                paragraph_features = self._extract_text_features(paragraph)
+                analyzed += 1
+            paragraphs[paragraph] = paragraph_features
+            count += 1
+            features.extend(paragraph_features)
+        self.post_paragraphs.put(post_id, (automaton, paragraphs))
+        
+        self.metrics["paragraphs_reused"] += count - analyzed
+        self.metrics["paragraphs_analyzed"] += analyzed
+        return features, {"post_id": post_id, "paragraphs": count, "paragraphs_reused": count - analyzed}
+    
+    def _inherit_near_duplicate(self, signature: np.ndarray, source: Optional[str]) -> Optional[Dict]:
+        """
+        Résultat hérité du contenu indexé le plus semblable: son analyse du texte
+        est reprise, la source est analysée à nouveau (None sans quasi-doublon)
+        """
+        match = self.near_duplicates.query(signature)
+        if match is None:
+            return None
+        similarity, content_analysis = match
+        self.metrics["near_duplicate_hits"] += 1
+        source_analysis = self._analyze_source(source) if source else {"reliability": "unknown"}
+        return {
+            **self._build_result(content_analysis, source_analysis),
+            "near_duplicate": {"similarity": similarity}
+        }
+    
+    def _analyze_uncached(self, content: str, source: Optional[str], early_exit: bool = False) -> Dict:
+        """Analyse complète d'un contenu normalisé (sans cache ni métriques)"""
+        # Analyse de la source
+        source_analysis = self._analyze_source(source) if source else {"reliability": "unknown"}
+        
+        # Analyse du contenu
+        if early_exit:
+            content_analysis, risk_bound = self._analyze_text_incremental(content, source_analysis)
+            if risk_bound is not None:
+                # Statut acquis: le score retenu est le minorant qui l'a établi
+                return self._build_result(content_analysis, source_analysis, risk_score=risk_bound)
+        else:
+            content_analysis = self._analyze_text(content)
+        if self.classifier is not None:
+            content_analysis["model_score"] = self.classifier.predict_batch([content])[0]
+        
+        return self._build_result(content_analysis, source_analysis)
+    
+    def _build_result(self, content_analysis: Dict, source_analysis: Dict, risk_score: Optional[float] = None) -> Dict:
+        """Score global, statut et recommandations à partir des analyses du texte et de la source"""
+        # Calcul du score global
+        if risk_score is None:
+            risk_score = self._calculate_risk_score(content_analysis, source_analysis)
+        
+        # Détermination du statut
+        status = self._determine_status(risk_score)
+        
+        # Génération des recommandations
+        recommendations = self._generate_recommendations(content_analysis, source_analysis, risk_score)
+        
+        return {
+            "status": status,
+            "risk_score": risk_score,
+            "confidence": min(0.95, 0.5 + abs(risk_score - 0.5)),
+            "content_analysis": content_analysis,
+            "source_analysis": source_analysis,
+            "recommendations": recommendations,
+            "keywords_found": content_analysis["suspicious_keywords"],
+            "timestamp": datetime.now().isoformat()
+        }
+    
+    def _analyze_text(self, content: str) -> Dict:
+        """Analyse le texte du contenu"""
+        return self._summarize_text_features(self._extract_text_features(content))
+    
+    def _extract_text_features(self, content: str) -> TextFeatures:
+        """
+        Extrait les comptages du texte: un seul découpage en mots, une seule mise
+        en minuscules, des patterns précompilés et des comptages en C
         
-        pattern_matches = []
-        for pattern in suspicious_patterns:
-            matches = re.findall(pattern, content)
-            if matches:
-                pattern_matches.append({"pattern": pattern, "count": len(matches)})
+        Args:
+            content: Texte à analyser
+            
+        Returns:
+            TextFeatures: Comptages bruts du texte
+        """
+        lowered = content.lower()
+        return TextFeatures(
+            length=len(content),
+            uppercase_count=count_uppercase(content),
+            exclamation_count=content.count("!"),
+            question_count=content.count("?"),
+            word_count=len(content.split()),
+            period_count=content.count("."),
+            pattern_counts=[len(pattern.findall(content)) for pattern in _SUSPICIOUS_PATTERN_RES],
+            # Recherche de mots-clés suspects (un seul passage, toutes les occurrences)
+            keyword_positions=self._get_keyword_automaton().find_all(lowered),
+            lowered_length=len(lowered)
+        )
+    
+    def _summarize_text_features(self, features: TextFeatures) -> Dict:
+        """
+        Dérive les indicateurs et le score de suspicion des comptages du texte
+        
+        Args:
+            features: Comptages produits par _extract_text_features
+            
+        Returns:
+            Dict: Analyse du texte
+        """
+        found_keywords, keyword_hits, pattern_matches = self._match_details(features)
+        
+        uppercase_ratio = features.uppercase_count / features.length if features.length else 0
+        keyword_density = len(found_keywords) / features.word_count if features.length else 0
         
         # Calcul du score de suspicion du texte
         suspicion_score = (
-            text_features["keyword_density"] * 0.3 +
-            text_features["exclamation_count"] * 0.1 +
-            text_features["uppercase_ratio"] * 0.2 +
+            keyword_density * 0.3 +
+            features.exclamation_count * 0.1 +
+            uppercase_ratio * 0.2 +
             len(pattern_matches) * 0.15
         )
         
+        return self._build_content_analysis(
+            features, found_keywords, keyword_hits, pattern_matches,
+            uppercase_ratio, keyword_density, min(1.0, suspicion_score),
+            self._readability_from_counts(features.length, features.word_count, features.period_count + 1)
+        )
+    
+    def _analyze_text_incremental(self, content: str, source_analysis: Dict) -> Tuple[Dict, Optional[float]]:
+        """
+        Analyse le texte phrase par phrase et s'arrête dès que le statut "fake"
+        ne peut plus changer
+        
+        Les phrases sont lues par groupes de taille doublant à chaque étape (1, 2,
+        4...), pour ne payer qu'un nombre logarithmique d'extractions quand le texte
+        est lu en entier. Après chaque groupe, un minorant du score de risque final
+        est calculé à partir des comptages accumulés: les points d'exclamation, les
+        mots-clés et les patterns trouvés ne peuvent qu'augmenter, la longueur
+        totale est connue et le nombre de mots restants est au plus la moitié des
+        caractères restants. Dès que ce minorant atteint le seuil "fake", la suite
+        du texte n'est pas analysée. Sans sortie anticipée, les comptages
+        accumulés sont exactement ceux du texte entier (voir sentence_ends).
+        
+        Args:
+            content: Texte normalisé
+            source_analysis: Analyse de la source (part fixe du score de risque)
+            
+        Returns:
+            Tuple[Dict, Optional[float]]: Analyse du texte (des phrases lues en cas de
+            sortie anticipée) et minorant du risque, ou None si tout le texte a été lu
+        """
+        ends = sentence_ends(content, self._get_keyword_automaton().keywords)
+        total_length = len(content)
+        source_risk = (1 - source_analysis.get("trust_score", 0.5)) * 0.4
+        # Le score du modèle, inconnu, est minoré par 0
+        content_weight = 1 - self.classifier_weight if self.classifier is not None else 1.0
+        
+        features = TextFeatures()
+        triggering = []
+        # Part fixe de la source: seuls les groupes qui relèvent le minorant sont rapportés
+        previous_bound = source_risk
+        risk_bound = None
+        sentences_scored = 0
+        group_size = 1
+        start = 0
+        while start < total_length or not sentences_scored:
+            group = list(islice(ends, group_size))
+            first_sentence = sentences_scored
+            sentences_scored += len(group)
+            end = group[-1]
+            features.extend(self._extract_text_features(content[start:end]))
+            if end >= total_length:
+                break
+            
+            found_keywords = [kw for kw in self.suspicious_keywords if kw in features.keyword_positions]
+            max_word_count = features.word_count + (total_length - end + 1) // 2
+            suspicion_bound = min(1.0, (
+                len(found_keywords) / max_word_count * 0.3 +
+                features.exclamation_count * 0.1 +
+                features.uppercase_count / total_length * 0.2 +
+                sum(1 for count in features.pattern_counts if count) * 0.15
+            ))
+            bound = min(1.0, suspicion_bound * content_weight * 0.6 + source_risk)
+            if bound > previous_bound:
+                triggering.append({
+                    "sentences": [first_sentence, sentences_scored - 1],
+                    "text": content[start:end].strip()[:200],
+                    "contribution": bound - previous_bound
+                })
+                previous_bound = bound
+            if bound >= 0.8:
+                risk_bound = bound
+                break
+            start = end
+            group_size *= 2
+        
+        content_analysis = self._summarize_text_features(features)
+        content_analysis["sentence_scoring"] = {
+            "sentences_scored": sentences_scored,
+            "characters_scored": features.length,
+            "early_exit": risk_bound is not None,
+            "triggering_sentences": triggering if risk_bound is not None else []
+        }
+        return content_analysis, risk_bound
+    
+    def _match_details(self, features: TextFeatures) -> Tuple[List[str], List[Dict], List[Dict]]:
+        """Mots-clés trouvés (dans l'ordre de la liste), leurs occurrences et les patterns suspects présents"""
+        keyword_positions = features.keyword_positions
+        found_keywords = [kw for kw in self.suspicious_keywords if kw in keyword_positions]
+        keyword_hits = [
+            {"keyword": kw, "count": len(keyword_positions[kw]), "positions": keyword_positions[kw]}
+            for kw in dict.fromkeys(found_keywords)
+        ]
+        
+        # Détection de patterns suspects
+        pattern_matches = [
+            {"pattern": pattern, "count": count}
+            for pattern, count in zip(SUSPICIOUS_PATTERNS, features.pattern_counts)
+            if count
+        ]
+        return found_keywords, keyword_hits, pattern_matches
+    
+    def _build_content_analysis(self, features: TextFeatures, found_keywords: List[str], keyword_hits: List[Dict],
+                                pattern_matches: List[Dict], uppercase_ratio: float, keyword_density: float,
+                                suspicion_score: float, readability_score: float) -> Dict:
+        """Assemble l'analyse du texte (même structure pour l'analyse unitaire et par lot)"""
         return {
-            **text_features,
+            "length": features.length,
+            "exclamation_count": features.exclamation_count,
+            "question_count": features.question_count,
+            "uppercase_ratio": uppercase_ratio,
+            "suspicious_keywords": found_keywords,
+            "keyword_hits": keyword_hits,
+            "keyword_density": keyword_density,
             "pattern_matches": pattern_matches,
-            "suspicion_score": min(1.0, suspicion_score),
-            "readability_score": self._calculate_readability(content)
+            "suspicion_score": suspicion_score,
+            "readability_score": readability_score
         }
     
     def _analyze_source(self, source: str) -> Dict:
@@ -139,61 +1227,147 @@ class FakeNewsDetector:
         if not source:
             return {"reliability": "unknown", "reason": "Source non spécifiée"}
         
-        source_lower = source.lower()
+        domain_index = self._get_domain_index()
+        host, has_https = parse_source(source)
+        
+        # Entrées fiables désignant une rubrique: le verdict dépend du chemin
+        if domain_index.reliable_substrings:
+            reliable = domain_index.match_reliable_path(source.lower())
+            if reliable is not None:
+                return self._apply_reputation(self._classify_source("high", reliable, host, has_https))
+        
+        # Sinon le verdict ne dépend que de l'hôte et du schéma: cache LRU par (hôte, https)
+        cache_key = (host, has_https)
+        verdict = self.source_cache.get(cache_key)
+        if verdict is None:
+            verdict = self._classify_source(*domain_index.lookup(host), host, has_https)
+            self.source_cache.put(cache_key, verdict)
+        return self._apply_reputation(dict(verdict))
+    
+    def _apply_reputation(self, verdict: Dict) -> Dict:
+        """
+        Remplace le trust_score statique par celui appris pour le domaine, si la
+        table de réputation en a déjà des observations
+        """
+        if self.reputation is None:
+            return verdict
+        counts = self.reputation.get(verdict["registrable_domain"])
+        if counts is None:
+            return verdict
+        prior = verdict["trust_score"]
+        analyses, flagged, reports = counts
+        verdict["trust_score"] = self.reputation.trust_score(counts, prior)
+        verdict["reputation"] = {
+            "analyses": analyses,
+            "flagged": flagged,
+            "reports": reports,
+            "prior_trust_score": prior
+        }
+        return verdict
+    
+    def _learn_source(self, result: Dict):
+        """
+        Compte une analyse dans la réputation du domaine de sa source
+        
+        Le contenu est jugé suspect d'après son seul risque textuel, sans la part
+        de la source: la réputation ne s'auto-entretient pas. Une sortie anticipée
+        (risque global >= 0.8, part de la source <= 0.4) implique un risque
+        textuel d'au moins 0.67.
+        """
+        if self.reputation is None:
+            return
+        domain = result["source_analysis"].get("registrable_domain")
+        if not domain:
+            return
+        content_analysis = result["content_analysis"]
+        if content_analysis.get("sentence_scoring", {}).get("early_exit"):
+            flagged = True
+        else:
+            flagged = self._content_risk(content_analysis) >= 0.5
+        self.reputation.record_analysis(domain, flagged)
+    
+    def record_report(self, source: str) -> Optional[str]:
+        """
+        Compte un signalement d'administration contre la source d'un contenu
+        
+        Returns:
+            Optional[str]: Domaine pénalisé (None sans table de réputation ou sans hôte)
+        """
+        if self.reputation is None or not source:
+            return None
+        host, _ = parse_source(source)
+        domain = registrable_domain(host)
+        if not domain:
+            return None
+        self.reputation.record_report(domain)
+        return domain
+    
+    def _classify_source(self, reliability: Optional[str], match: Optional[str], host: str, has_https: bool) -> Dict:
+        """Verdict de fiabilité d'une source à partir du résultat de l'index des domaines"""
         
         # Vérification des sources fiables
-        for reliable in self.reliable_sources:
-            if reliable in source_lower:
-                return {
-                    "reliability": "high",
-                    "trust_score": 0.9,
-                    "reason": f"Source reconnue comme fiable: {reliable}"
-                }
+        if reliability == "high":
+            return {
+                "reliability": "high",
+                "trust_score": 0.9,
+                "domain": host,
+                "registrable_domain": registrable_domain(host),
+                "reason": f"Source reconnue comme fiable: {match}"
+            }
         
         # Vérification des patterns suspects
-        for pattern in self.unreliable_patterns:
-            if re.match(pattern, source_lower):
-                return {
-                    "reliability": "low",
-                    "trust_score": 0.2,
-                    "reason": f"Pattern suspect détecté: {pattern}"
-                }
+        if reliability == "low":
+            return {
+                "reliability": "low",
+                "trust_score": 0.2,
+                "domain": host,
+                "registrable_domain": registrable_domain(host),
+                "reason": f"Pattern suspect détecté: {match}"
+            }
         
         # Analyse par défaut
-        domain_indicators = self._analyze_domain(source)
-        
         return {
             "reliability": "medium",
             "trust_score": 0.5,
-            "domain_analysis": domain_indicators,
+            "domain": host,
+            "registrable_domain": registrable_domain(host),
+            "domain_analysis": self._domain_indicators(host, has_https),
             "reason": "Source non vérifiée"
         }
     
     def _analyze_domain(self, source: str) -> Dict:
         """Analyse les caractéristiques du domaine"""
         try:
-            # Extraction du domaine
-            domain = source.split("//")[-1].split("/")[0] if "//" in source else source.split("/")[0]
-            
-            indicators = {
-                "has_https": source.startswith("https://"),
-                "domain_length": len(domain),
-                "has_numbers": bool(re.search(r'\d', domain)),
-                "has_subdomains": domain.count(".") > 1,
-                "suspicious_tld": domain.endswith((".info", ".biz", ".click", ".xyz"))
-            }
-            
-            return indicators
+            return self._domain_indicators(*parse_source(source))
         except:
             return {"error": "Impossible d'analyser le domaine"}
     
+    def _domain_indicators(self, domain: str, has_https: bool) -> Dict:
+        """Indicateurs de risque d'un hôte déjà extrait"""
+        return {
+            "has_https": has_https,
+            "domain_length": len(domain),
+            "has_numbers": bool(re.search(r'\d', domain)),
+            "has_subdomains": domain.count(".") > 1,
+            "suspicious_tld": domain.endswith((".info", ".biz", ".click", ".xyz"))
+        }
+    
+    def _content_risk(self, content_analysis: Dict) -> float:
+        """Risque du seul texte: règles, mélangées au score du modèle statistique s'il est configuré"""
+        content_risk = content_analysis.get("suspicion_score", 0)
+        model_score = content_analysis.get("model_score")
+        if model_score is not None:
+            weight = self.classifier_weight
+            content_risk = (1 - weight) * content_risk + weight * model_score
+        return content_risk
+    
     def _calculate_risk_score(self, content_analysis: Dict, source_analysis: Dict) -> float:
         """Calcule le score de risque global"""
         content_weight = 0.6
         source_weight = 0.4
         
         # Score de contenu (plus élevé = plus suspect)
-        content_risk = content_analysis.get("suspicion_score", 0)
+        content_risk = self._content_risk(content_analysis)
         
         # Score de source (plus élevé = plus suspect)
         source_trust = source_analysis.get("trust_score", 0.5)
@@ -254,16 +1428,14 @@ class FakeNewsDetector:
     
     def _calculate_readability(self, content: str) -> float:
         """Calcule un score de lisibilité simplifié"""
-        if not content:
-            return 0.0
-        
-        words = content.split()
-        sentences = content.split(".")
-        
-        if not sentences:
+        return self._readability_from_counts(len(content), len(content.split()), content.count(".") + 1)
+    
+    def _readability_from_counts(self, length: int, word_count: int, sentence_count: int) -> float:
+        """Score de lisibilité à partir des nombres de mots et de phrases (découpage sur '.')"""
+        if not length:
             return 0.0
         
-        avg_words_per_sentence = len(words) / len(sentences)
+        avg_words_per_sentence = word_count / sentence_count
         
         # Score simplifié (plus élevé = plus lisible)
         readability = max(0, 1 - (avg_words_per_sentence - 15) / 30)
@@ -293,7 +1465,16 @@ class FakeNewsDetector:
             "fake_rate": self.metrics["fake_detected"] / total,
             "suspicious_rate": self.metrics["suspicious_detected"] / total,
             "reliable_rate": self.metrics["reliable_detected"] / total,
-            "average_analysis_time": avg_analysis_time
+            "average_analysis_time": avg_analysis_time,
+            "cache_hits": self.metrics["cache_hits"],
+            "near_duplicate_hits": self.metrics["near_duplicate_hits"],
+            "paragraphs_reused": self.metrics["paragraphs_reused"],
+            "paragraphs_analyzed": self.metrics["paragraphs_analyzed"],
+            "result_cache": self.result_cache.get_stats(),
+            "near_duplicates": self.near_duplicates.get_stats() if self.near_duplicates is not None else None,
+            "classifier": self.classifier.get_metrics() if self.classifier is not None else None,
+            "reputation": self.reputation.get_stats() if self.reputation is not None else None,
+            "source_cache": self.source_cache.get_stats()
         }
     
     async def health_check(self) -> Dict:
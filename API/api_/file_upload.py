@@ -1,72 +1,355 @@
 import os
+import json
 import uuid
+import asyncio
+from collections import OrderedDict
 from fastapi import FastAPI, UploadFile, File, HTTPException
 from fastapi.responses import JSONResponse
-from typing import List
+from typing import Dict, List, Optional
 import shutil
 from pathlib import Path
 
 # Configuration
 UPLOAD_DIR = "uploads"
+QUARANTINE_DIR = "quarantine"
 MAX_FILE_SIZE = 5 * 1024 * 1024  # 5MB
 ALLOWED_EXTENSIONS = {"png", "jpg", "jpeg", "gif"}
 
-# Créer le dossier de téléchargement s'il n'existe pas
+# Signatures (magic bytes) des formats d'image acceptés
+IMAGE_SIGNATURES = {
+    b"\x89PNG\r\n\x1a\n": "png",
+    b"\xff\xd8\xff": "jpg",
+    b"GIF87a": "gif",
+    b"GIF89a": "gif"
+}
+
+# Nombre maximal de statuts de modération conservés en mémoire
+MAX_TRACKED_UPLOADS = 10000
+
+# Journal des statuts de modération (une ligne JSON par changement de statut)
+UPLOAD_STATUS_PATH = os.path.join("cache", "upload_statuses.jsonl")
+
+# Nouvelles tentatives après un échec qui ne tient pas à l'image (budget de
+# décodage saturé, délai dépassé, panne du pool de processus...), l'attente
+# doublant à chaque tentative
+MODERATION_RETRIES = 3
+MODERATION_RETRY_DELAY = 2.0
+
+# Créer les dossiers de téléchargement et de quarantaine s'ils n'existent pas
 Path(UPLOAD_DIR).mkdir(parents=True, exist_ok=True)
+Path(QUARANTINE_DIR).mkdir(parents=True, exist_ok=True)
 
 def allowed_file(filename: str) -> bool:
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-async def save_uploaded_files(files: List[UploadFile]) -> List[dict]:
-    saved_files = []
-    
-    for file in files:
-        if not file.filename or not allowed_file(file.filename):
-            raise HTTPException(
-                status_code=400, 
-                detail=f"Type de fichier non autorisé pour {file.filename}. Types autorisés: {', '.join(ALLOWED_EXTENSIONS)}"
-            )
+def sniff_image_type(contents: bytes) -> Optional[str]:
+    """Détermine le format d'une image d'après ses premiers octets, sans se fier à l'extension"""
+    for signature, file_ext in IMAGE_SIGNATURES.items():
+        if contents.startswith(signature):
+            return file_ext
+    return None
+
+class UploadModerationPipeline:
+    """
+    Étape de modération des téléchargements: les fichiers sont écrits en
+    quarantaine, analysés en arrière-plan par ContentModerator et publiés
+    dans le dossier public uniquement s'ils sont approuvés
+    
+    Les statuts sont journalisés dans status_path: au redémarrage, resume()
+    relance la modération des fichiers restés en quarantaine.
+    """
+    
+    def __init__(self, moderator, upload_dir: str = UPLOAD_DIR, quarantine_dir: str = QUARANTINE_DIR,
+                 status_path: Optional[str] = None):
+        self.moderator = moderator
+        self.upload_dir = upload_dir
+        self.quarantine_dir = quarantine_dir
+        self.status_path = status_path
+        self.statuses: "OrderedDict[str, Dict]" = OrderedDict()
+        self._tasks = set()
+        self._journal = None
+        self._journal_lines = 0
+        
+        Path(upload_dir).mkdir(parents=True, exist_ok=True)
+        Path(quarantine_dir).mkdir(parents=True, exist_ok=True)
+        if status_path:
+            self._load_statuses()
+    
+    async def submit(self, files: List[UploadFile]) -> List[dict]:
+        """
+        Valide les fichiers, les écrit en quarantaine et lance leur modération
+        
+        Args:
+            files: Fichiers reçus
+            
+        Returns:
+            List[dict]: Fichiers acceptés, au statut "pending"
+        """
+        accepted = []
+        
+        for file in files:
+            # Lire au plus MAX_FILE_SIZE + 1 octets pour vérifier la taille
+            contents = await file.read(MAX_FILE_SIZE + 1)
+            if len(contents) > MAX_FILE_SIZE:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Le fichier {file.filename} dépasse la taille maximale autorisée de 5MB"
+                )
+            
+            # Vérifier le type réel du fichier d'après son contenu
+            file_ext = sniff_image_type(contents)
+            if file_ext is None:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Type de fichier non autorisé pour {file.filename}. Types autorisés: {', '.join(sorted(ALLOWED_EXTENSIONS))}"
+                )
             
-        # Lire le contenu pour vérifier la taille
-        contents = await file.read()
-        if len(contents) > MAX_FILE_SIZE:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Le fichier {file.filename} dépasse la taille maximale autorisée de 5MB"
-            )
+            accepted.append((file, contents, file_ext))
             
-        # Générer un nom de fichier unique
-        file_ext = file.filename.split('.')[-1]
-        filename = f"{uuid.uuid4()}.{file_ext}"
-        file_path = os.path.join(UPLOAD_DIR, filename)
+            # Réinitialiser le curseur du fichier
+            await file.seek(0)
         
-        # Sauvegarder le fichier
-        with open(file_path, "wb") as buffer:
-            buffer.write(contents)
+        saved_files = []
+        for file, contents, file_ext in accepted:
+            # Générer un nom de fichier unique et l'écrire en quarantaine
+            moderation_id = str(uuid.uuid4())
+            filename = f"{moderation_id}.{file_ext}"
+            with open(os.path.join(self.quarantine_dir, filename), "wb") as buffer:
+                buffer.write(contents)
             
-        saved_files.append({
-            "filename": filename,
-            "original_name": file.filename,
-            "content_type": file.content_type,
-            "size": len(contents),
-            "url": f"/{UPLOAD_DIR}/{filename}"
-        })
+            entry = {
+                "moderation_id": moderation_id,
+                "filename": filename,
+                "original_name": file.filename,
+                "content_type": file.content_type,
+                "size": len(contents),
+                "status": "pending",
+                "url": None,
+                "status_url": f"/api/upload/status/{moderation_id}"
+            }
+            self._track(moderation_id, entry)
+            saved_files.append(dict(entry))
+            
+            # Modération en arrière-plan: la réponse n'attend pas l'analyse
+            self._schedule(moderation_id)
+        
+        return saved_files
+    
+    def _schedule(self, moderation_id: str):
+        task = asyncio.create_task(self._moderate(moderation_id))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+    
+    async def resume(self) -> int:
+        """
+        Relance la modération des fichiers restés en quarantaine (au démarrage)
         
-        # Réinitialiser le curseur du fichier
-        await file.seek(0)
+        Sont relancés les fichiers au statut pending, ceux mis en revue après un
+        échec de l'analyse elle-même, et ceux dont le statut n'a pas été conservé. Un statut
+        pending dont le fichier a déjà été publié devient approved (error si le
+        fichier a disparu).
         
-    return saved_files
+        Returns:
+            int: Nombre de fichiers remis en modération
+        """
+        by_filename = {entry["filename"]: entry for entry in self.statuses.values()}
+        for entry in list(self.statuses.values()):
+            if entry["status"] != "pending" or os.path.exists(os.path.join(self.quarantine_dir, entry["filename"])):
+                continue
+            if os.path.exists(os.path.join(self.upload_dir, entry["filename"])):
+                # Publication faite, statut non journalisé avant l'arrêt
+                self._publish_status(entry)
+            else:
+                entry["status"] = "error"
+                entry["reason"] = "Fichier introuvable en quarantaine"
+            self._record(entry)
+        
+        resumed = 0
+        for filename in sorted(os.listdir(self.quarantine_dir)):
+            if not allowed_file(filename) or not os.path.isfile(os.path.join(self.quarantine_dir, filename)):
+                continue
+            entry = by_filename.get(filename)
+            if entry is None:
+                moderation_id = filename.rsplit(".", 1)[0]
+                entry = {
+                    "moderation_id": moderation_id,
+                    "filename": filename,
+                    "original_name": None,
+                    "content_type": None,
+                    "size": os.path.getsize(os.path.join(self.quarantine_dir, filename)),
+                    "status": "pending",
+                    "url": None,
+                    "status_url": f"/api/upload/status/{moderation_id}"
+                }
+                self._track(moderation_id, entry)
+            elif entry["status"] == "review" and entry.get("retryable"):
+                entry["status"] = "pending"
+                self._record(entry)
+            elif entry["status"] != "pending":
+                continue
+            self._schedule(entry["moderation_id"])
+            resumed += 1
+        return resumed
+    
+    def _is_image_rejection(self, result: Dict) -> bool:
+        """Rejet qui tient à l'image: contenu inapproprié, image illisible ou trop volumineuse"""
+        if "error" not in result:
+            return result["recommendation"] == "reject"
+        return result.get("admission") == "too_large" or bool(result.get("invalid_image"))
+    
+    def _is_transient(self, result: Dict) -> bool:
+        """Échec qui ne dit rien de l'image (budget saturé, délai dépassé, processus en panne...)"""
+        return "error" in result and not self._is_image_rejection(result)
+    
+    async def _moderate(self, moderation_id: str):
+        """Analyse un fichier en quarantaine puis le publie, le retient ou le supprime"""
+        entry = self.statuses.get(moderation_id)
+        if entry is None:
+            return
+        quarantine_path = os.path.join(self.quarantine_dir, entry["filename"])
+        
+        try:
+            with open(quarantine_path, "rb") as f:
+                contents = f.read()
+            for attempt in range(MODERATION_RETRIES + 1):
+                try:
+                    result = (await self.moderator.batch_analyze([contents]))[0]
+                except Exception as e:
+                    # Panne de l'analyse elle-même: le fichier est conservé
+                    result = {
+                        "safe": False,
+                        "error": f"Erreur lors de la modération: {str(e)}",
+                        "recommendation": "review"
+                    }
+                if not self._is_transient(result) or attempt == MODERATION_RETRIES:
+                    break
+                await asyncio.sleep(MODERATION_RETRY_DELAY * 2 ** attempt)
+            
+            entry["recommendation"] = result["recommendation"]
+            entry["reason"] = result.get("reason") or result.get("error")
+            entry.pop("retryable", None)
+            if result["recommendation"] == "approve" and "error" not in result:
+                # Publication: déplacement atomique vers le dossier public
+                os.replace(quarantine_path, os.path.join(self.upload_dir, entry["filename"]))
+                self._publish_status(entry)
+            elif self._is_image_rejection(result):
+                # Seul un rejet dû à l'image supprime le fichier
+                os.remove(quarantine_path)
+                entry["status"] = "rejected"
+            else:
+                # Conservé en quarantaine pour une revue manuelle; un échec de
+                # l'analyse elle-même est retenté au prochain démarrage
+                entry["status"] = "review"
+                entry["retryable"] = self._is_transient(result)
+        except Exception as e:
+            entry["status"] = "error"
+            entry["reason"] = f"Erreur lors de la modération: {str(e)}"
+        self._record(entry)
+    
+    def _publish_status(self, entry: Dict):
+        entry["status"] = "approved"
+        entry["url"] = f"/{self.upload_dir}/{entry['filename']}"
+    
+    def resolve_review(self, moderation_id: str, approve: bool) -> Optional[Dict]:
+        """
+        Décision manuelle sur un fichier en revue: publication ou suppression
+        
+        Returns:
+            Optional[Dict]: Statut mis à jour, ou None si le fichier n'est pas en revue
+        """
+        entry = self.statuses.get(moderation_id)
+        if entry is None or entry["status"] != "review":
+            return None
+        quarantine_path = os.path.join(self.quarantine_dir, entry["filename"])
+        if approve:
+            os.replace(quarantine_path, os.path.join(self.upload_dir, entry["filename"]))
+            self._publish_status(entry)
+        else:
+            os.remove(quarantine_path)
+            entry["status"] = "rejected"
+        entry["recommendation"] = "approve" if approve else "reject"
+        entry["reason"] = "Décision de revue manuelle"
+        entry.pop("retryable", None)
+        self._record(entry)
+        return dict(entry)
+    
+    def list_reviews(self) -> List[Dict]:
+        """Fichiers retenus en quarantaine en attente d'une revue manuelle"""
+        return [dict(entry) for entry in self.statuses.values() if entry["status"] == "review"]
+    
+    def _track(self, moderation_id: str, entry: Dict):
+        self.statuses[moderation_id] = entry
+        while len(self.statuses) > MAX_TRACKED_UPLOADS:
+            self.statuses.popitem(last=False)
+        self._record(entry)
+    
+    def _record(self, entry: Dict):
+        """Journalise le statut courant d'un fichier (compactage au-delà de 2 lignes par statut)"""
+        if not self.status_path:
+            return
+        if self._journal is None:
+            self._compact_statuses()
+        self._journal.write(json.dumps(entry) + "\n")
+        self._journal.flush()
+        self._journal_lines += 1
+        if self._journal_lines > 2 * MAX_TRACKED_UPLOADS:
+            self._compact_statuses()
+    
+    def _load_statuses(self):
+        """Recharge le dernier statut de chaque fichier (une dernière ligne tronquée est ignorée)"""
+        if not os.path.exists(self.status_path):
+            return
+        with open(self.status_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                self.statuses.pop(entry["moderation_id"], None)
+                self.statuses[entry["moderation_id"]] = entry
+        while len(self.statuses) > MAX_TRACKED_UPLOADS:
+            self.statuses.popitem(last=False)
+    
+    def _compact_statuses(self):
+        """Réécrit le journal (atomiquement) avec une ligne par statut conservé"""
+        if self._journal is not None:
+            self._journal.close()
+        directory = os.path.dirname(self.status_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = f"{self.status_path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            for entry in self.statuses.values():
+                f.write(json.dumps(entry) + "\n")
+        os.replace(temp_path, self.status_path)
+        self._journal = open(self.status_path, "a", encoding="utf-8")
+        self._journal_lines = len(self.statuses)
+    
+    def close(self):
+        """Ferme le journal des statuts"""
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+    
+    def get_status(self, moderation_id: str) -> Optional[Dict]:
+        """Retourne le statut de modération d'un fichier téléchargé"""
+        entry = self.statuses.get(moderation_id)
+        return dict(entry) if entry is not None else None
+
+async def save_uploaded_files(files: List[UploadFile], pipeline: UploadModerationPipeline) -> List[dict]:
+    """Met les fichiers en quarantaine et lance leur modération (publication après approbation)"""
+    return await pipeline.submit(files)
 
 # Route pour le téléchargement de fichiers
-async def handle_file_upload(files: List[UploadFile] = File(...)):
+async def handle_file_upload(pipeline: UploadModerationPipeline, files: List[UploadFile] = File(...)):
     try:
         if not files:
             raise HTTPException(status_code=400, detail="Aucun fichier fourni")
             
-        saved_files = await save_uploaded_files(files)
+        saved_files = await save_uploaded_files(files, pipeline)
         
         return {
-            "message": "Fichiers téléchargés avec succès",
+            "message": "Fichiers reçus, modération en cours",
             "files": saved_files
         }
     except HTTPException as he:
@@ -0,0 +1,216 @@
+import asyncio
+import time
+import importlib.util
+from PIL import Image
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+
+from classifier_input import classifier_thumbnail
+
+def _import_torch():
+    """Importe torch à la demande, au chargement du modèle (plusieurs secondes et centaines de Mo)"""
+    try:
+        import torch
+    except ImportError:
+        raise ImportError("torch est requis pour TorchClassifierBackend") from None
+    return torch
+
+class TorchClassifierBackend:
+    """
+    Backend de classification CPU pour la modération d'images
+    
+    Les requêtes concurrentes sont regroupées en micro-batchs: la première
+    requête d'un batch attend au plus max_wait_ms que d'autres la rejoignent
+    (jusqu'à max_batch_size), puis une seule passe avant est exécutée hors de
+    la boucle d'événements.
+    """
+    
+    def __init__(self, model_path: Optional[str] = None, input_size: int = 64,
+                 max_batch_size: int = 32, max_wait_ms: float = 5.0,
+                 max_queue_size: int = 1024, quantize: bool = False,
+                 num_threads: Optional[int] = None):
+        if importlib.util.find_spec("torch") is None:
+            raise ImportError("torch est requis pour TorchClassifierBackend")
+        self.model_path = model_path
+        self.input_size = input_size
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.max_queue_size = max_queue_size
+        self.quantize = quantize
+        self.num_threads = num_threads
+        
+        self.model = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._scheduler: Optional[asyncio.Task] = None
+        self.metrics = {"requests": 0, "batches": 0, "max_batch": 0, "total_queue_wait_ms": 0.0}
+    
+    def load(self):
+        """
+        Charge le modèle (TorchScript ou state_dict de ModerationCNN) depuis model_path
+        
+        Sans chemin, le modèle est initialisé aléatoirement (tests, mesures de débit).
+        """
+        if self.model is not None:
+            return self.model
+        torch = _import_torch()
+        from torch import nn
+        from moderation_cnn import ModerationCNN
+        if self.num_threads:
+            torch.set_num_threads(self.num_threads)
+        
+        model = None
+        if self.model_path:
+            try:
+                model = torch.jit.load(self.model_path, map_location="cpu")
+            except RuntimeError:
+                model = ModerationCNN(self.input_size)
+                model.load_state_dict(torch.load(self.model_path, map_location="cpu"))
+        else:
+            model = ModerationCNN(self.input_size)
+        model.eval()
+        
+        # Quantification dynamique int8 des couches linéaires pour le débit CPU
+        if self.quantize and isinstance(model, nn.Module) and not isinstance(model, torch.jit.ScriptModule):
+            model = torch.ao.quantization.quantize_dynamic(model, {nn.Linear}, dtype=torch.qint8)
+        self.model = model
+        return model
+    
+    def preprocess(self, image: Image.Image) -> np.ndarray:
+        """
+        Réduit une image à la vignette RGB uint8 attendue par le modèle
+        
+        Args:
+            image: Image PIL (tout mode)
+        
+        Returns:
+            np.ndarray: Vignette (input_size, input_size, 3) en uint8
+        """
+        return classifier_thumbnail(image, self.input_size)
+    
+    def predict_batch(self, thumbnails: List[np.ndarray]) -> List[Tuple[float, float]]:
+        """
+        Passe avant synchrone sur un lot de vignettes
+        
+        Returns:
+            List[Tuple[float, float]]: Scores (nudité, violence) entre 0 et 1
+        """
+        model = self.load()
+        torch = _import_torch()
+        batch = torch.from_numpy(np.stack(thumbnails)).permute(0, 3, 1, 2).float().div_(255.0)
+        with torch.inference_mode():
+            scores = torch.sigmoid(model(batch))
+        return [tuple(row) for row in scores.tolist()]
+    
+    async def predict(self, thumbnail: np.ndarray) -> Tuple[float, float]:
+        """
+        Score une vignette via le planificateur de micro-batchs
+        
+        Args:
+            thumbnail: Vignette produite par preprocess()
+        
+        Returns:
+            Tuple[float, float]: Scores (nudité, violence) entre 0 et 1
+        """
+        loop = asyncio.get_running_loop()
+        if self._scheduler is None or self._scheduler.done():
+            self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+            self._scheduler = loop.create_task(self._run_scheduler())
+        future = loop.create_future()
+        # File bornée: les producteurs attendent si le modèle est saturé
+        await self._queue.put((thumbnail, future, time.perf_counter()))
+        return await future
+    
+    async def _run_scheduler(self):
+        """Regroupe les requêtes en attente et exécute une passe avant par batch"""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait_ms / 1000
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            
+            started = time.perf_counter()
+            self.metrics["requests"] += len(batch)
+            self.metrics["batches"] += 1
+            self.metrics["max_batch"] = max(self.metrics["max_batch"], len(batch))
+            self.metrics["total_queue_wait_ms"] += sum((started - queued) * 1000 for _, _, queued in batch)
+            
+            try:
+                scores = await loop.run_in_executor(None, self.predict_batch, [item[0] for item in batch])
+            except Exception as e:
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            for (_, future, _), score in zip(batch, scores):
+                if not future.done():
+                    future.set_result(score)
+    
+    def close(self):
+        """Arrête le planificateur de micro-batchs"""
+        if self._scheduler is not None:
+            self._scheduler.cancel()
+            self._scheduler = None
+    
+    def get_metrics(self) -> Dict:
+        requests = self.metrics["requests"]
+        batches = self.metrics["batches"]
+        return {
+            "requests": requests,
+            "batches": batches,
+            "average_batch_size": requests / batches if batches else 0.0,
+            "max_batch_size": self.metrics["max_batch"],
+            "average_queue_wait_ms": self.metrics["total_queue_wait_ms"] / requests if requests else 0.0,
+            "quantized": self.quantize
+        }
+
+async def compare_throughput(backend: TorchClassifierBackend, requests: int = 256) -> Dict:
+    """
+    Compare le débit de l'inférence image par image et du micro-batching
+    
+    Args:
+        backend: Backend à mesurer (un modèle aléatoire suffit)
+        requests: Nombre de requêtes concurrentes simulées
+    
+    Returns:
+        Dict: Images par seconde dans les deux modes et gain obtenu
+    """
+    rng = np.random.default_rng(0)
+    thumbnails = [
+        rng.integers(0, 256, (backend.input_size, backend.input_size, 3), dtype=np.uint8)
+        for _ in range(requests)
+    ]
+    backend.load()
+    backend.predict_batch(thumbnails[:1])
+    
+    start = time.perf_counter()
+    for thumbnail in thumbnails:
+        backend.predict_batch([thumbnail])
+    per_image = requests / (time.perf_counter() - start)
+    
+    start = time.perf_counter()
+    await asyncio.gather(*(backend.predict(thumbnail) for thumbnail in thumbnails))
+    batched = requests / (time.perf_counter() - start)
+    
+    return {
+        "requests": requests,
+        "per_image_images_per_sec": per_image,
+        "micro_batched_images_per_sec": batched,
+        "speedup": batched / per_image if per_image else 0.0,
+        "scheduler": backend.get_metrics()
+    }
+
+if __name__ == "__main__":
+    import json
+    import sys
+    
+    model_path = sys.argv[1] if len(sys.argv) > 1 else None
+    for quantize in (False, True):
+        result = asyncio.run(compare_throughput(TorchClassifierBackend(model_path, quantize=quantize)))
+        print(json.dumps(result, indent=2))
@@ -1,6 +1,8 @@
-from fastapi import FastAPI, HTTPException, UploadFile, File
+from fastapi import FastAPI, HTTPException, UploadFile, File, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
+from fastapi.responses import StreamingResponse
+from starlette.datastructures import UploadFile as FormFile
 from pydantic import BaseModel
 from typing import List, Dict, Optional
 import uvicorn
@@ -11,6 +13,7 @@ import re
 import random
 import os
 import uuid
+import tempfile
 
 # Import des modules IA
 from chatbot import ChatbotAI
@@ -18,6 +21,10 @@ from fake_news_detector import FakeNewsDetector
 from message_analyzer import MessageAnalyzer
 from dashboard_automation import DashboardAutomation
 from content_moderator import ContentModerator
+from decode_admission import DecodeAdmissionError
+from file_upload import UploadModerationPipeline, save_uploaded_files, QUARANTINE_DIR, UPLOAD_STATUS_PATH
+from text_classifier import HashingTextClassifier
+from source_reputation import SourceReputationTable
 
 app = FastAPI(title="Educational Platform AI API", version="1.0.0")
 
@@ -26,6 +33,9 @@ UPLOAD_DIR = "uploads"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 app.mount("/uploads", StaticFiles(directory=UPLOAD_DIR), name="uploads")
 
+# Cache persistant des verdicts de modération d'images
+MODERATION_CACHE_PATH = os.path.join("cache", "moderation_verdicts.json")
+
 # Configuration CORS
 app.add_middleware(
     CORSMiddleware,
@@ -35,12 +45,39 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialisation des services IA
-chatbot = ChatbotAI()
-fake_news_detector = FakeNewsDetector()
-message_analyzer = MessageAnalyzer()
-dashboard_automation = DashboardAutomation()
-content_moderator = ContentModerator()
+# Modèle statistique optionnel de détection de fake news (python text_classifier.py train ...)
+FAKE_NEWS_MODEL_PATH = os.path.join("models", "fake_news_text.joblib")
+
+# Réputation apprise des sources (compteurs par domaine, fichier projeté en mémoire)
+REPUTATION_PATH = os.path.join("cache", "source_reputation.bin")
+
+# Services IA, construits au démarrage du serveur (init_services) et non à l'import:
+# importer ce module ne charge aucun modèle ni fichier d'état
+chatbot: Optional[ChatbotAI] = None
+fake_news_detector: Optional[FakeNewsDetector] = None
+message_analyzer: Optional[MessageAnalyzer] = None
+dashboard_automation: Optional[DashboardAutomation] = None
+content_moderator: Optional[ContentModerator] = None
+upload_pipeline: Optional[UploadModerationPipeline] = None
+source_reputation: Optional[SourceReputationTable] = None
+
+@app.on_event("startup")
+async def init_services():
+    """Initialisation des services IA"""
+    global chatbot, fake_news_detector, message_analyzer, dashboard_automation
+    global content_moderator, upload_pipeline, source_reputation
+    try:
+        fake_news_classifier = HashingTextClassifier(FAKE_NEWS_MODEL_PATH) if os.path.exists(FAKE_NEWS_MODEL_PATH) else None
+    except ImportError:
+        fake_news_classifier = None
+    source_reputation = SourceReputationTable(REPUTATION_PATH)
+    
+    chatbot = ChatbotAI()
+    fake_news_detector = FakeNewsDetector(classifier=fake_news_classifier, reputation=source_reputation)
+    message_analyzer = MessageAnalyzer()
+    dashboard_automation = DashboardAutomation()
+    content_moderator = ContentModerator(cache_path=MODERATION_CACHE_PATH)
+    upload_pipeline = UploadModerationPipeline(content_moderator, UPLOAD_DIR, QUARANTINE_DIR, status_path=UPLOAD_STATUS_PATH)
 
 # Modèles de données
 class TutorRequest(BaseModel):
@@ -57,6 +94,8 @@ class FakeNewsRequest(BaseModel):
     content: str
     source: Optional[str] = None
     metadata: Optional[Dict] = None
+    early_exit: bool = False
+    post_id: Optional[str] = None
 
 class MessageAnalysisRequest(BaseModel):
     message: str
@@ -118,7 +157,9 @@ async def detect_fake_news(request: FakeNewsRequest):
         result = await fake_news_detector.analyze_content(
             content=request.content,
             source=request.source,
-            metadata=request.metadata
+            metadata=request.metadata,
+            early_exit=request.early_exit,
+            post_id=request.post_id
         )
         return result
     except Exception as e:
@@ -128,18 +169,115 @@ async def detect_fake_news(request: FakeNewsRequest):
 async def batch_analyze_news(requests: List[FakeNewsRequest]):
     """Analyse batch de contenu"""
     try:
-        results = []
-        for req in requests:
-            result = await fake_news_detector.analyze_content(
-                content=req.content,
-                source=req.source,
-                metadata=req.metadata
-            )
-            results.append(result)
+        results = await fake_news_detector.analyze_batch([
+            {"content": req.content, "source": req.source, "metadata": req.metadata}
+            for req in requests
+        ])
         return {"results": results}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+# Flux NDJSON de fake news: éléments analysés ensemble au plus, taille maximale
+# d'une ligne, et taille du corps gardée en mémoire avant débordement sur disque
+FAKE_NEWS_STREAM_BLOCK = 256
+FAKE_NEWS_STREAM_MAX_LINE = 1024 * 1024
+FAKE_NEWS_STREAM_SPOOL = 8 * 1024 * 1024
+
+async def _spool_request_body(request: Request):
+    """
+    Copie le corps de la requête, reçu morceau par morceau, dans un fichier
+    temporaire (en mémoire jusqu'à FAKE_NEWS_STREAM_SPOOL octets)
+    
+    Le corps est lu en entier avant de répondre: la plupart des clients HTTP/1.1
+    n'écoutent la réponse qu'une fois la requête envoyée, et lire le corps au
+    rythme de la réponse les bloquerait mutuellement.
+    """
+    spool = tempfile.SpooledTemporaryFile(max_size=FAKE_NEWS_STREAM_SPOOL)
+    async for chunk in request.stream():
+        spool.write(chunk)
+    spool.seek(0)
+    return spool
+
+def _iter_ndjson_blocks(spool, block_size: int = FAKE_NEWS_STREAM_BLOCK):
+    """
+    Lit les lignes non vides d'un corps NDJSON par blocs d'au plus block_size
+    (None à la place d'une ligne trop longue, qui n'est pas chargée en mémoire)
+    """
+    block = []
+    while True:
+        line = spool.readline(FAKE_NEWS_STREAM_MAX_LINE + 1)
+        if not line:
+            break
+        if len(line) > FAKE_NEWS_STREAM_MAX_LINE and not line.endswith(b"\n"):
+            # Sauter la fin de la ligne trop longue: elle compte pour un élément
+            while line and not line.endswith(b"\n"):
+                line = spool.readline(FAKE_NEWS_STREAM_MAX_LINE + 1)
+            block.append(None)
+        elif line.strip():
+            block.append(line)
+        if len(block) >= block_size:
+            yield block
+            block = []
+    if block:
+        yield block
+
+def _parse_fake_news_line(line: Optional[bytes]) -> Dict:
+    """Valide une ligne du flux comme un FakeNewsRequest"""
+    if line is None:
+        raise ValueError(f"ligne de plus de {FAKE_NEWS_STREAM_MAX_LINE} octets")
+    req = FakeNewsRequest(**json.loads(line))
+    return {"content": req.content, "source": req.source, "metadata": req.metadata}
+
+@app.post("/api/fake-news/batch-analyze/stream")
+async def batch_analyze_news_stream(request: Request):
+    """
+    Analyse batch en flux: corps NDJSON (un FakeNewsRequest par ligne), réponse
+    NDJSON avec une ligne par élément, dans l'ordre, dès que son bloc est analysé
+    
+    Un élément invalide ou en échec produit une ligne d'erreur sans interrompre le
+    flux. Les blocs ne sont analysés qu'au rythme où le client lit la réponse.
+    """
+    try:
+        spool = await _spool_request_body(request)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Lecture du corps impossible: {str(e)}")
+    
+    async def results():
+        index = 0
+        try:
+            for lines in _iter_ndjson_blocks(spool):
+                outputs: List[Optional[Dict]] = [None] * len(lines)
+                items = []
+                for position, line in enumerate(lines):
+                    try:
+                        items.append((position, _parse_fake_news_line(line)))
+                    except Exception as e:
+                        outputs[position] = {
+                            "status": "error",
+                            "error": f"Élément invalide: {str(e)}",
+                            "timestamp": datetime.now().isoformat()
+                        }
+                
+                try:
+                    analyzed = await fake_news_detector.analyze_batch([item for _, item in items])
+                except Exception:
+                    # Échec du bloc: chaque élément est repris seul (analyze_content
+                    # renvoie un résultat d'erreur sans lever d'exception)
+                    analyzed = [
+                        await fake_news_detector.analyze_content(item["content"], item["source"], item["metadata"])
+                        for _, item in items
+                    ]
+                for (position, _), result in zip(items, analyzed):
+                    outputs[position] = result
+                
+                for result in outputs:
+                    yield json.dumps({"index": index, **result}) + "\n"
+                    index += 1
+        finally:
+            spool.close()
+    
+    return StreamingResponse(results(), media_type="application/x-ndjson")
+
 @app.get("/api/fake-news/stats")
 async def get_fake_news_stats():
     """Statistiques de détection"""
@@ -232,6 +370,8 @@ async def analyze_image_content(request: ContentModerationRequest):
             "safe": result["safe"],
             "recommendation": result["recommendation"]
         }
+    except DecodeAdmissionError as e:
+        raise _admission_http_error(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -243,15 +383,108 @@ async def batch_analyze_images(images_data: List[str]):
         decoded_images = [base64.b64decode(img) for img in images_data]
         
         results = await content_moderator.batch_analyze(decoded_images)
+        _raise_if_all_busy(results)
         
         return {
             "status": "success",
             "results": results,
             "all_safe": all(r["safe"] for r in results)
         }
+    except HTTPException as he:
+        raise he
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def _admission_http_error(error: DecodeAdmissionError) -> HTTPException:
+    """Traduire un refus du contrôle d'admission du décodage en réponse HTTP (413 ou 503)"""
+    headers = {"Retry-After": "5"} if error.status_code == 503 else None
+    return HTTPException(status_code=error.status_code, detail=str(error), headers=headers)
+
+def _raise_if_all_busy(results: List[Dict]):
+    """Un batch entièrement refusé faute de budget de décodage est signalé en 503"""
+    if results and all(r.get("admission") == "busy" for r in results):
+        raise HTTPException(
+            status_code=503,
+            detail="Budget de décodage saturé, réessayez plus tard",
+            headers={"Retry-After": "5"}
+        )
+
+async def _read_image_parts(request: Request) -> List[bytes]:
+    """Lire les images d'un corps binaire (octet-stream/image/*) ou multipart, sans base64"""
+    content_type = request.headers.get("content-type", "")
+    if content_type.startswith("multipart/form-data"):
+        form = await request.form()
+        try:
+            return [await part.read() for _, part in form.multi_items() if isinstance(part, FormFile)]
+        finally:
+            await form.close()
+    if content_type.startswith(("application/octet-stream", "image/")):
+        return [await request.body()]
+    raise HTTPException(
+        status_code=415,
+        detail="Type de contenu non supporté. Types acceptés: application/octet-stream, image/*, multipart/form-data"
+    )
+
+@app.post("/api/content/analyze-image/binary")
+async def analyze_image_binary(request: Request):
+    """Analyser une image envoyée en binaire brut ou en multipart (sans encodage base64)"""
+    images_data = await _read_image_parts(request)
+    if len(images_data) != 1 or not images_data[0]:
+        raise HTTPException(status_code=400, detail="Une seule image est attendue")
+    try:
+        result = await content_moderator.analyze_image(images_data[0])
+        
+        return {
+            "status": "success",
+            "analysis": result,
+            "safe": result["safe"],
+            "recommendation": result["recommendation"]
+        }
+    except DecodeAdmissionError as e:
+        raise _admission_http_error(e)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/content/batch-analyze/binary")
+async def batch_analyze_images_binary(request: Request):
+    """Analyser plusieurs images envoyées dans une requête multipart (une partie par image)"""
+    images_data = await _read_image_parts(request)
+    if not images_data:
+        raise HTTPException(status_code=400, detail="Aucune image fournie")
+    try:
+        results = await content_moderator.batch_analyze(images_data)
+        _raise_if_all_busy(results)
+        
+        return {
+            "status": "success",
+            "results": results,
+            "all_safe": all(r["safe"] for r in results)
+        }
+    except HTTPException as he:
+        raise he
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.on_event("shutdown")
+async def shutdown_content_moderator():
+    """Arrêter le pool de processus de la modération batch"""
+    content_moderator.shutdown()
+
+@app.on_event("startup")
+async def resume_upload_moderation():
+    """Relancer la modération des fichiers restés en quarantaine"""
+    await upload_pipeline.resume()
+
+@app.on_event("shutdown")
+async def shutdown_upload_pipeline():
+    """Fermer le journal des statuts de modération des téléchargements"""
+    upload_pipeline.close()
+
+@app.on_event("shutdown")
+async def shutdown_source_reputation():
+    """Écrire sur disque la table de réputation des sources"""
+    source_reputation.close()
+
 @app.get("/api/content/stats")
 async def get_content_stats():
     """Statistiques de modération de contenu"""
@@ -279,6 +512,16 @@ async def admin_analysis(data: dict):
         print(f"Erreur lors de la réception des données d'analyse: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def _report_source(data: dict) -> Optional[str]:
+    """Source d'un post signalé: champ source, sinon celle de son analyse de fake news"""
+    if isinstance(data.get("source"), str):
+        return data["source"]
+    analysis = data.get("analysis_data")
+    source_analysis = analysis.get("source_analysis") if isinstance(analysis, dict) else None
+    if isinstance(source_analysis, dict) and isinstance(source_analysis.get("domain"), str):
+        return source_analysis["domain"]
+    return None
+
 @app.post("/api/admin/reports")
 async def admin_reports(data: dict):
     """Recevoir les signalements de posts"""
@@ -291,7 +534,10 @@ async def admin_reports(data: dict):
         admin_reports.data.append(data)
         print(f"Total signalements stockés: {len(admin_reports.data)}")
         print(f"Dernier signalement: {admin_reports.data[-1]}")
-        return {"status": "success", "message": "Signalement enregistré"}
+        
+        # Le signalement pèse sur la réputation de la source du post
+        domain = fake_news_detector.record_report(_report_source(data))
+        return {"status": "success", "message": "Signalement enregistré", "reputation_domain": domain}
     except Exception as e:
         print(f"Erreur lors de la réception du signalement: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -458,45 +704,15 @@ async def upload_files(files: List[UploadFile] = File(...)):
     Télécharge un ou plusieurs fichiers.
     
     - **files**: Liste de fichiers à télécharger (max 5 fichiers, 5MB par fichier)
+    
+    Les fichiers sont placés en quarantaine et modérés en arrière-plan; ils ne
+    sont publiés dans `/uploads` qu'après approbation (voir `status_url`).
     """
     try:
-        saved_files = []
+        saved_files = await save_uploaded_files(files, upload_pipeline)
         
-        for file in files:
-            # Vérifier le type de fichier
-            file_ext = file.filename.split('.')[-1].lower()
-            if file_ext not in {"png", "jpg", "jpeg", "gif"}:
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"Type de fichier non autorisé pour {file.filename}. Types autorisés: png, jpg, jpeg, gif"
-                )
-                
-            # Lire le contenu pour vérifier la taille
-            contents = await file.read()
-            if len(contents) > 5 * 1024 * 1024:  # 5MB
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"Le fichier {file.filename} dépasse la taille maximale autorisée de 5MB"
-                )
-                
-            # Générer un nom de fichier unique
-            filename = f"{uuid.uuid4()}.{file_ext}"
-            file_path = os.path.join(UPLOAD_DIR, filename)
-            
-            # Sauvegarder le fichier
-            with open(file_path, "wb") as buffer:
-                buffer.write(contents)
-                
-            saved_files.append({
-                "filename": filename,
-                "original_name": file.filename,
-                "content_type": file.content_type,
-                "size": len(contents),
-                "url": f"/{UPLOAD_DIR}/{filename}"
-            })
-            
         return {
-            "message": "Fichiers téléchargés avec succès",
+            "message": "Fichiers reçus, modération en cours",
             "files": saved_files
         }
     except HTTPException as he:
@@ -504,5 +720,33 @@ async def upload_files(files: List[UploadFile] = File(...)):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erreur lors du téléchargement des fichiers: {str(e)}")
 
+@app.get("/api/upload/status/{moderation_id}")
+async def get_upload_status(moderation_id: str):
+    """Statut de modération d'un fichier téléchargé (pending, approved, review, rejected)"""
+    status = upload_pipeline.get_status(moderation_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Téléchargement introuvable")
+    return status
+
+@app.get("/api/admin/uploads/review")
+async def get_uploads_in_review():
+    """Fichiers retenus en quarantaine en attente d'une revue manuelle"""
+    return {"uploads": upload_pipeline.list_reviews()}
+
+@app.post("/api/admin/uploads/{moderation_id}/review")
+async def review_upload(moderation_id: str, data: dict):
+    """Décision manuelle sur un fichier en revue ({"approve": true} publie, false supprime)"""
+    try:
+        if not isinstance(data.get("approve"), bool):
+            raise HTTPException(status_code=400, detail="Champ approve (booléen) requis")
+        status = upload_pipeline.resolve_review(moderation_id, data["approve"])
+        if status is None:
+            raise HTTPException(status_code=404, detail="Aucun fichier en revue avec cet identifiant")
+        return status
+    except HTTPException as he:
+        raise he
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=5000)
@@ -0,0 +1,21 @@
+from torch import nn
+
+class ModerationCNN(nn.Module):
+    """Petit CNN (vignette RGB -> logits nudité / violence)"""
+    
+    def __init__(self, input_size: int = 64):
+        super().__init__()
+        self.features = nn.Sequential(
+            nn.Conv2d(3, 16, 3, stride=2, padding=1), nn.ReLU(),
+            nn.Conv2d(16, 32, 3, stride=2, padding=1), nn.ReLU(),
+            nn.Conv2d(32, 64, 3, stride=2, padding=1), nn.ReLU()
+        )
+        flat_size = 64 * (input_size // 8) * (input_size // 8)
+        self.head = nn.Sequential(
+            nn.Flatten(),
+            nn.Linear(flat_size, 256), nn.ReLU(),
+            nn.Linear(256, 2)
+        )
+    
+    def forward(self, x):
+        return self.head(self.features(x))
@@ -0,0 +1,150 @@
+import math
+from typing import Dict, List, Optional
+
+# Histogrammes des scores: 10 intervalles de largeur 0.1 sur [0, 1]
+SCORE_BUCKETS = 10
+
+# Histogramme des latences: intervalles géométriques de 0.05 ms à ~100 s (facteur 1.25)
+LATENCY_MIN_MS = 0.05
+LATENCY_GROWTH = 1.25
+LATENCY_BUCKETS = 66
+
+class LatencyHistogram:
+    """Histogramme à intervalles géométriques fixes pour estimer des quantiles en mémoire O(1)"""
+    
+    def __init__(self):
+        # Intervalle 0: < LATENCY_MIN_MS, dernier intervalle: au-delà de la borne max
+        self.counts = [0] * (LATENCY_BUCKETS + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+    
+    def record(self, value_ms: float):
+        if value_ms < LATENCY_MIN_MS:
+            bucket = 0
+        else:
+            bucket = min(LATENCY_BUCKETS, 1 + int(math.log(value_ms / LATENCY_MIN_MS, LATENCY_GROWTH)))
+        self.counts[bucket] += 1
+        self.count += 1
+        self.total_ms += value_ms
+        if value_ms > self.max_ms:
+            self.max_ms = value_ms
+    
+    def quantile(self, q: float, counts: Optional[List[int]] = None) -> float:
+        """
+        Estime un quantile (borne haute de l'intervalle qui le contient)
+        
+        Args:
+            q: Quantile entre 0 et 1
+            counts: Copie des compteurs (par défaut les compteurs courants)
+        
+        Returns:
+            float: Latence estimée en millisecondes
+        """
+        counts = self.counts if counts is None else counts
+        total = sum(counts)
+        if total == 0:
+            return 0.0
+        rank = q * total
+        cumulative = 0
+        for bucket, bucket_count in enumerate(counts):
+            cumulative += bucket_count
+            if cumulative >= rank and bucket_count:
+                if bucket == LATENCY_BUCKETS:
+                    return self.max_ms
+                return min(self.max_ms, LATENCY_MIN_MS * LATENCY_GROWTH ** bucket)
+        return self.max_ms
+    
+    def snapshot(self) -> Dict:
+        # Copie des compteurs: la lecture ne bloque jamais les mises à jour
+        counts = list(self.counts)
+        count = self.count
+        return {
+            "count": count,
+            "mean_ms": self.total_ms / count if count else 0.0,
+            "p50_ms": self.quantile(0.5, counts),
+            "p90_ms": self.quantile(0.9, counts),
+            "p99_ms": self.quantile(0.99, counts),
+            "max_ms": self.max_ms
+        }
+
+class ModerationStats:
+    """
+    Agrégats de modération en flux: mémoire constante, mise à jour sans verrou
+    à chaque requête (simples incréments) et lecture par copie instantanée
+    """
+    
+    def __init__(self):
+        self.total_analyzed = 0
+        self.errors = 0
+        self.cache_hits = 0
+        self.by_recommendation: Dict[str, int] = {"approve": 0, "review": 0, "reject": 0}
+        self.by_cascade_stage: Dict[str, int] = {"preview": 0, "full": 0}
+        self.scored = 0
+        self.nudity_mean = 0.0
+        self.violence_mean = 0.0
+        self.nudity_histogram = [0] * SCORE_BUCKETS
+        self.violence_histogram = [0] * SCORE_BUCKETS
+        self.decode_latency = LatencyHistogram()
+        self.analysis_latency = LatencyHistogram()
+    
+    def record(self, result: Dict):
+        """
+        Met à jour les agrégats avec le résultat d'une analyse
+        
+        Args:
+            result: Résultat renvoyé par ContentModerator (analyse, cache ou erreur)
+        """
+        self.total_analyzed += 1
+        recommendation = result.get("recommendation", "reject")
+        self.by_recommendation[recommendation] = self.by_recommendation.get(recommendation, 0) + 1
+        
+        if "error" in result:
+            self.errors += 1
+            return
+        
+        if result.get("cached"):
+            self.cache_hits += 1
+        else:
+            cascade = result.get("cascade")
+            if cascade is not None:
+                stage = cascade["stage"]
+                self.by_cascade_stage[stage] = self.by_cascade_stage.get(stage, 0) + 1
+            timings = result.get("timings") or {}
+            if "decode_ms" in timings:
+                self.decode_latency.record(timings["decode_ms"])
+            if "analysis_ms" in timings:
+                self.analysis_latency.record(timings["analysis_ms"])
+        
+        nudity_score = result.get("nudity_score")
+        violence_score = result.get("violence_score")
+        if nudity_score is None or violence_score is None:
+            return
+        self.scored += 1
+        self.nudity_mean += (nudity_score - self.nudity_mean) / self.scored
+        self.violence_mean += (violence_score - self.violence_mean) / self.scored
+        self.nudity_histogram[self._score_bucket(nudity_score)] += 1
+        self.violence_histogram[self._score_bucket(violence_score)] += 1
+    
+    def _score_bucket(self, score: float) -> int:
+        return min(SCORE_BUCKETS - 1, max(0, int(score * SCORE_BUCKETS)))
+    
+    def snapshot(self) -> Dict:
+        """Retourne une copie instantanée des agrégats sans interrompre l'analyse"""
+        by_recommendation = dict(self.by_recommendation)
+        return {
+            "total_analyzed": self.total_analyzed,
+            "blocked_images": by_recommendation.get("reject", 0),
+            "approved_images": by_recommendation.get("approve", 0),
+            "review_images": by_recommendation.get("review", 0),
+            "errors": self.errors,
+            "cache_hits": self.cache_hits,
+            "by_recommendation": by_recommendation,
+            "by_cascade_stage": dict(self.by_cascade_stage),
+            "average_nudity_score": self.nudity_mean,
+            "average_violence_score": self.violence_mean,
+            "nudity_histogram": list(self.nudity_histogram),
+            "violence_histogram": list(self.violence_histogram),
+            "decode_latency": self.decode_latency.snapshot(),
+            "analysis_latency": self.analysis_latency.snapshot()
+        }
@@ -0,0 +1,376 @@
+import os
+import io
+import json
+import time
+import hashlib
+from collections import OrderedDict
+from PIL import Image
+import numpy as np
+from typing import Dict, List, Optional, Set, Tuple
+
+# Taille de la vignette utilisée pour le dHash (9x8 -> 64 comparaisons)
+HASH_WIDTH = 9
+HASH_HEIGHT = 8
+HASH_BITS = (HASH_WIDTH - 1) * HASH_HEIGHT
+# Plus grand côté de l'image réduite d'où la vignette est tirée
+HASH_SOURCE_SIZE = HASH_WIDTH * 8
+# Modes que Image.reduce() sait traiter directement
+REDUCIBLE_MODES = {"RGB", "RGBA", "L", "LA", "CMYK", "I", "F"}
+# Côté de la vignette RGB d'où la signature de couleur est tirée
+COLOUR_SIZE = 16
+# Empreinte d'une image fixe: dHash et signature de couleur (colour_signature)
+ImageFingerprint = Tuple[int, Tuple[float, float, float, float]]
+# Écarts maximaux entre deux signatures de couleur de la même image: moyenne
+# de chaque canal (niveaux 0-255) et ratio de pixels de couleur peau (0-1)
+COLOUR_CHANNEL_TOLERANCE = 12.0
+COLOUR_SKIN_TOLERANCE = 0.05
+
+def perceptual_hash(image: Image.Image) -> int:
+    """
+    Calcule le dHash 64 bits d'une image à partir d'une vignette en niveaux de gris
+    
+    Args:
+        image: Image PIL (décodage réduit conseillé pour le JPEG)
+    
+    Returns:
+        int: Empreinte perceptuelle sur 64 bits
+    """
+    thumbnail = image.convert("L").resize((HASH_WIDTH, HASH_HEIGHT), Image.BILINEAR)
+    levels = np.asarray(thumbnail, dtype=np.int16)
+    bits = (levels[:, 1:] > levels[:, :-1]).ravel()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+def colour_signature(image: Image.Image) -> Tuple[float, float, float, float]:
+    """
+    Calcule la signature de couleur d'une image: moyenne des canaux R, G, B et
+    ratio de pixels de couleur peau (règle de ContentModerator) sur une vignette
+    
+    Le dHash ne voit que les niveaux de gris: une image recolorée (en tons chair
+    par exemple) garde son empreinte perceptuelle mais pas sa signature de couleur.
+    
+    Args:
+        image: Image PIL (tout mode)
+    
+    Returns:
+        Tuple: Moyennes des canaux R, G, B et ratio de peau
+    """
+    thumbnail = image.convert("RGB").resize((COLOUR_SIZE, COLOUR_SIZE), Image.BILINEAR)
+    pixels = np.asarray(thumbnail, dtype=np.int16).reshape(-1, 3)
+    red, green, blue = pixels[:, 0], pixels[:, 1], pixels[:, 2]
+    skin = (red > 95) & (green > 40) & (blue > 20) & (red > np.maximum(green, blue))
+    means = pixels.mean(axis=0)
+    return (
+        round(float(means[0]), 2),
+        round(float(means[1]), 2),
+        round(float(means[2]), 2),
+        round(float(skin.mean()), 4)
+    )
+
+def colours_match(first: Tuple[float, ...], second: Tuple[float, ...]) -> bool:
+    """Indique si deux signatures de couleur (colour_signature) sont assez proches"""
+    return (
+        all(abs(a - b) <= COLOUR_CHANNEL_TOLERANCE for a, b in zip(first[:3], second[:3])) and
+        abs(first[3] - second[3]) <= COLOUR_SKIN_TOLERANCE
+    )
+
+def image_fingerprint(image_data: bytes) -> Optional[ImageFingerprint]:
+    """
+    Calcule le dHash et la signature de couleur d'une image encodée en décodant
+    le moins de pixels possible
+    
+    Le JPEG est décodé directement à échelle réduite; les autres formats sont
+    décodés puis réduits par moyenne de blocs, sans copie de l'image en pleine
+    résolution. À n'appeler qu'une fois le décodage admis (DecodeAdmissionController).
+    
+    Args:
+        image_data: Données binaires de l'image
+    
+    Returns:
+        Optional[ImageFingerprint]: dHash sur 64 bits et signature de couleur, ou
+        None pour une image animée (sa première image ne résume pas les
+        suivantes) ou illisible
+    """
+    try:
+        image = Image.open(io.BytesIO(image_data))
+        if getattr(image, "is_animated", False):
+            return None
+        # Décodage JPEG à résolution réduite: la vignette ne nécessite pas l'image complète
+        image.draft("RGB", (HASH_SOURCE_SIZE, HASH_SOURCE_SIZE))
+        factor = max(image.size) // HASH_SOURCE_SIZE
+        if factor >= 2:
+            if image.mode not in REDUCIBLE_MODES:
+                image = image.convert("RGBA" if "transparency" in image.info else "RGB")
+            image = image.reduce(factor)
+        return perceptual_hash(image), colour_signature(image)
+    except Exception:
+        # Image illisible: l'analyse complète produira l'erreur
+        return None
+
+class PerceptualHashCache:
+    """
+    Cache LRU des verdicts de modération indexé par empreinte exacte et perceptuelle
+    
+    Une correspondance perceptuelle exige aussi une signature de couleur proche,
+    le dHash ne distinguant pas une image de sa version recolorée. Les images
+    animées ne sont servies que sur empreinte exacte: leur entrée n'a pas de
+    dHash et n'entre pas dans l'index par bandes. Chaque entrée porte l'empreinte
+    des paramètres de modération qui ont produit son verdict et sa date
+    d'enregistrement: elle n'est plus servie si ces paramètres changent ou
+    au-delà de ttl secondes.
+    """
+    
+    def __init__(self, max_entries: int = 10000, max_distance: int = 3,
+                 persist_path: Optional[str] = None, persist_every: int = 100,
+                 ttl: Optional[float] = 7 * 24 * 3600.0):
+        self.max_entries = max_entries
+        self.max_distance = max_distance
+        self.persist_path = persist_path
+        self.persist_every = persist_every
+        self.ttl = ttl
+        
+        # Condensat de la première image -> {"fingerprint", "settings", "stored_at",
+        # "verdict", "digests"} dans l'ordre d'utilisation
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+        self._digests: Dict[str, str] = {}
+        
+        # Index par bandes: avec max_distance + 1 bandes, deux empreintes à distance
+        # <= max_distance partagent forcément au moins une bande identique
+        band_count = max_distance + 1
+        band_width = -(-HASH_BITS // band_count)
+        self._band_shifts = [i * band_width for i in range(band_count)]
+        self._band_mask = (1 << band_width) - 1
+        self._bands: List[Dict[int, Set[str]]] = [{} for _ in range(band_count)]
+        
+        self._pending_writes = 0
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        
+        if persist_path and os.path.exists(persist_path):
+            self.load()
+    
+    def lookup_exact(self, image_data: bytes, settings: str) -> Tuple[Optional[Dict], str]:
+        """
+        Recherche le verdict d'une image identique (condensat des octets, sans décodage)
+        
+        Args:
+            image_data: Données binaires de l'image
+            settings: Empreinte des paramètres de modération courants
+        
+        Returns:
+            Tuple: Verdict en cache (ou None) et condensat à transmettre à lookup_similar()
+        """
+        digest = hashlib.blake2b(image_data, digest_size=16).hexdigest()
+        key = self._digests.get(digest)
+        if key is not None and not self._is_current(key, settings):
+            self._remove(key)
+            key = None
+        if key is None:
+            return None, digest
+        self.hits += 1
+        return self._hit(key, "exact", 0), digest
+    
+    def lookup_similar(self, digest: str, fingerprint: Optional[ImageFingerprint],
+                       settings: str) -> Tuple[Optional[Dict], Optional[Tuple]]:
+        """
+        Recherche le verdict d'une image quasi identique, après un échec de lookup_exact()
+        
+        Args:
+            digest: Condensat renvoyé par lookup_exact()
+            fingerprint: Empreinte de l'image (image_fingerprint), None pour une
+                image animée ou illisible: aucune correspondance approchée
+            settings: Empreinte des paramètres de modération courants
+        
+        Returns:
+            Tuple: Verdict en cache (ou None) et empreinte à réutiliser pour store()
+        """
+        if fingerprint is None:
+            self.misses += 1
+            return None, (digest, None, settings)
+        
+        match = self._nearest(fingerprint, settings)
+        if match is not None:
+            key, distance = match
+            self.hits += 1
+            self._add_digest(key, digest)
+            return self._hit(key, "perceptual", distance), None
+        
+        self.misses += 1
+        return None, (digest, fingerprint, settings)
+    
+    def store(self, fingerprint: Optional[Tuple], verdict: Dict):
+        """
+        Enregistre le verdict d'une image analysée
+        
+        Args:
+            fingerprint: Empreinte renvoyée par lookup_similar()
+            verdict: Résultat de l'analyse (les erreurs ne sont pas mises en cache)
+        """
+        if fingerprint is None or "error" in verdict or self.max_entries <= 0:
+            return
+        digest, image_fingerprint, settings = fingerprint
+        self._insert(digest, image_fingerprint, settings, time.time(), [digest], verdict)
+        
+        self._pending_writes += 1
+        if self.persist_path and self._pending_writes >= self.persist_every:
+            self.save()
+    
+    def _insert(self, key: str, fingerprint: Optional[ImageFingerprint], settings: str,
+                stored_at: float, digests: List[str], verdict: Dict):
+        """
+        Ajoute ou remplace une entrée et ses empreintes exactes (sans persistance)
+        
+        Sans dHash (image animée), l'entrée n'entre pas dans l'index par bandes.
+        """
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = {
+            "fingerprint": fingerprint,
+            "settings": settings,
+            "stored_at": stored_at,
+            "verdict": verdict,
+            "digests": []
+        }
+        if fingerprint is not None:
+            for band, index in zip(self._band_keys(fingerprint[0]), self._bands):
+                index.setdefault(band, set()).add(key)
+        for digest in digests:
+            self._add_digest(key, digest)
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+    
+    def _is_current(self, key: str, settings: str) -> bool:
+        """Indique si une entrée a été produite avec ces paramètres et n'a pas expiré"""
+        entry = self._entries[key]
+        if entry["settings"] != settings:
+            return False
+        if self.ttl is not None and time.time() - entry["stored_at"] > self.ttl:
+            self.expired += 1
+            return False
+        return True
+    
+    def _hit(self, key: str, match: str, distance: int) -> Dict:
+        """Construit la réponse d'un verdict servi depuis le cache"""
+        self._entries.move_to_end(key)
+        verdict = dict(self._entries[key]["verdict"])
+        verdict["cached"] = True
+        verdict["cache_match"] = match
+        verdict["hash_distance"] = distance
+        return verdict
+    
+    def _nearest(self, fingerprint: ImageFingerprint, settings: str) -> Optional[Tuple[str, int]]:
+        """
+        Trouve l'entrée courante la plus proche à distance <= max_distance et de
+        signature de couleur compatible; les entrées périmées rencontrées sont retirées
+        """
+        image_hash, colour = fingerprint
+        candidates = set()
+        for band, index in zip(self._band_keys(image_hash), self._bands):
+            candidates.update(index.get(band, ()))
+        
+        best = None
+        stale = []
+        for key in candidates:
+            cached_hash, cached_colour = self._entries[key]["fingerprint"]
+            distance = bin(cached_hash ^ image_hash).count("1")
+            if distance > self.max_distance or not colours_match(colour, cached_colour):
+                continue
+            if not self._is_current(key, settings):
+                stale.append(key)
+            elif best is None or distance < best[1]:
+                best = (key, distance)
+        for key in stale:
+            self._remove(key)
+        return best
+    
+    def _band_keys(self, image_hash: int) -> List[int]:
+        return [(image_hash >> shift) & self._band_mask for shift in self._band_shifts]
+    
+    def _add_digest(self, key: str, digest: str):
+        previous = self._digests.get(digest)
+        if previous == key:
+            return
+        if previous is not None:
+            self._entries[previous]["digests"].remove(digest)
+        self._digests[digest] = key
+        self._entries[key]["digests"].append(digest)
+    
+    def _remove(self, key: str):
+        entry = self._entries.pop(key)
+        for digest in entry["digests"]:
+            self._digests.pop(digest, None)
+        if entry["fingerprint"] is None:
+            return
+        for band, index in zip(self._band_keys(entry["fingerprint"][0]), self._bands):
+            members = index.get(band)
+            if members is not None:
+                members.discard(key)
+                if not members:
+                    del index[band]
+    
+    def save(self):
+        """Écrit le cache sur disque de manière atomique"""
+        if not self.persist_path:
+            return
+        directory = os.path.dirname(self.persist_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        payload = [
+            {
+                "key": key,
+                "hash": f"{entry['fingerprint'][0]:016x}" if entry["fingerprint"] is not None else None,
+                "colour": list(entry["fingerprint"][1]) if entry["fingerprint"] is not None else None,
+                "settings": entry["settings"],
+                "stored_at": entry["stored_at"],
+                "digests": entry["digests"],
+                "verdict": entry["verdict"]
+            }
+            for key, entry in self._entries.items()
+        ]
+        temp_path = f"{self.persist_path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(payload, f)
+        os.replace(temp_path, self.persist_path)
+        self._pending_writes = 0
+    
+    def load(self):
+        """
+        Recharge le cache depuis le disque (du moins au plus récemment utilisé)
+        
+        Les entrées expirées et celles d'un format antérieur (sans empreinte des
+        paramètres ni date) sont ignorées.
+        """
+        try:
+            with open(self.persist_path, "r", encoding="utf-8") as f:
+                payload = json.load(f)
+        except (OSError, ValueError):
+            return
+        now = time.time()
+        # Insertion directe: le fichier relu n'a pas à être réécrit
+        for item in payload[-self.max_entries:] if self.max_entries > 0 else []:
+            if "settings" not in item or "stored_at" not in item:
+                continue
+            if self.ttl is not None and now - item["stored_at"] > self.ttl:
+                continue
+            fingerprint = None
+            if item["hash"] is not None:
+                fingerprint = (int(item["hash"], 16), tuple(item["colour"]))
+            self._insert(item["key"], fingerprint, item["settings"], item["stored_at"], item["digests"], item["verdict"])
+    
+    def clear(self):
+        """Vide le cache"""
+        self._entries.clear()
+        self._digests.clear()
+        for index in self._bands:
+            index.clear()
+    
+    def get_stats(self) -> Dict:
+        """Retourne les statistiques du cache"""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "expired": self.expired,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
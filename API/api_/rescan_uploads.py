@@ -0,0 +1,236 @@
+"""
+Re-modération en masse du dossier des téléchargements
+
+Parcourt UPLOAD_DIR, analyse chaque image dans un pool de processus et
+consigne les résultats dans un manifeste JSONL (une ligne par fichier analysé).
+Une exécution interrompue reprend là où elle s'était arrêtée: les fichiers dont
+le contenu (sha256) et les paramètres de modération n'ont pas changé depuis
+leur dernière entrée du manifeste sont ignorés.
+    
+    python rescan_uploads.py --workers 8
+    python rescan_uploads.py --violence-threshold 0.7 --manifest cache/rescan.jsonl
+"""
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+import multiprocessing
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime
+from typing import Dict, Iterator, Optional
+
+from content_moderator import ContentModerator, _analyze_image_in_worker
+from file_upload import UPLOAD_DIR, allowed_file
+
+DEFAULT_MANIFEST = os.path.join("cache", "rescan_manifest.jsonl")
+
+# Nombre maximal d'analyses soumises au pool et non encore terminées, par processus
+IN_FLIGHT_PER_WORKER = 4
+
+def settings_fingerprint(settings: Dict) -> str:
+    """Empreinte des paramètres de modération: un changement de seuil invalide le manifeste"""
+    payload = json.dumps(settings, sort_keys=True, default=list)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+def iter_upload_files(upload_dir: str) -> Iterator[str]:
+    """Parcourt récursivement le dossier des téléchargements (images autorisées uniquement)"""
+    for root, dirs, files in os.walk(upload_dir):
+        dirs.sort()
+        for filename in sorted(files):
+            if allowed_file(filename):
+                yield os.path.join(root, filename)
+
+def load_manifest(manifest_path: str) -> Dict[str, Dict]:
+    """
+    Charge la dernière entrée de chaque fichier du manifeste
+    
+    Une dernière ligne tronquée (interruption pendant l'écriture) est ignorée.
+    
+    Returns:
+        Dict[str, Dict]: Entrée la plus récente par chemin relatif
+    """
+    entries = {}
+    if not os.path.exists(manifest_path):
+        return entries
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            entries[entry["path"]] = entry
+    return entries
+
+def compact_manifest(manifest_path: str, entries: Dict[str, Dict]):
+    """Réécrit le manifeste (atomiquement) avec une seule entrée par fichier existant"""
+    temp_path = f"{manifest_path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        for path in sorted(entries):
+            f.write(json.dumps(entries[path]) + "\n")
+    os.replace(temp_path, manifest_path)
+
+def _scan_file(settings: Dict, path: str, known_sha256: Optional[str]) -> Dict:
+    """
+    Point d'entrée exécuté dans un processus du pool: hachage puis analyse
+    
+    Args:
+        settings: Paramètres du modérateur (ContentModerator._worker_settings)
+        path: Chemin du fichier
+        known_sha256: Empreinte du manifeste; l'analyse est sautée si elle est inchangée
+    
+    Returns:
+        Dict: sha256 du contenu, et résultat de l'analyse sauf si sautée
+    """
+    with open(path, "rb") as f:
+        image_data = f.read()
+    sha256 = hashlib.sha256(image_data).hexdigest()
+    if sha256 == known_sha256:
+        return {"sha256": sha256, "skipped": True}
+    
+    result = _analyze_image_in_worker(settings, image_data)
+    # Résultat sérialisable et compact: les détails de débogage ne sont pas conservés
+    result.pop("timings", None)
+    return {"sha256": sha256, "skipped": False, "result": result}
+
+def rescan(upload_dir: str = UPLOAD_DIR, manifest_path: str = DEFAULT_MANIFEST,
+           workers: Optional[int] = None, moderator: Optional[ContentModerator] = None,
+           force: bool = False, compact: bool = True) -> Dict:
+    """
+    Re-modère les fichiers de upload_dir et met à jour le manifeste
+    
+    Args:
+        upload_dir: Dossier des téléchargements
+        manifest_path: Manifeste JSONL (créé ou complété)
+        workers: Nombre de processus (défaut: nombre de CPU)
+        moderator: Modérateur dont les paramètres sont appliqués (défaut: paramètres par défaut)
+        force: Ré-analyser tous les fichiers, même inchangés
+        compact: Réécrire le manifeste avec une entrée par fichier en fin de parcours
+    
+    Returns:
+        Dict: Résumé (fichiers analysés, ignorés, erreurs, recommandations)
+    """
+    moderator = moderator or ContentModerator(batch_workers=0, cache_size=0)
+    settings = moderator._worker_settings()
+    fingerprint = settings_fingerprint(settings)
+    workers = workers or os.cpu_count() or 1
+    
+    directory = os.path.dirname(manifest_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    entries = load_manifest(manifest_path)
+    
+    summary = {
+        "settings_fingerprint": fingerprint,
+        "files": 0,
+        "analyzed": 0,
+        "skipped": 0,
+        "errors": 0,
+        "by_recommendation": {"approve": 0, "review": 0, "reject": 0}
+    }
+    start = time.perf_counter()
+    seen = set()
+    
+    executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+    try:
+        with open(manifest_path, "a", encoding="utf-8") as manifest:
+            pending = {}
+            files = iter_upload_files(upload_dir)
+            exhausted = False
+            while pending or not exhausted:
+                # Alimenter le pool sans charger toute l'arborescence en file d'attente
+                while not exhausted and len(pending) < workers * IN_FLIGHT_PER_WORKER:
+                    path = next(files, None)
+                    if path is None:
+                        exhausted = True
+                        break
+                    relative = os.path.relpath(path, upload_dir)
+                    entry = entries.get(relative)
+                    known = None
+                    if not force and entry is not None and entry.get("settings_fingerprint") == fingerprint:
+                        known = entry.get("sha256")
+                    seen.add(relative)
+                    summary["files"] += 1
+                    pending[executor.submit(_scan_file, settings, path, known)] = (relative, entry)
+                if not pending:
+                    break
+                
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    relative, entry = pending.pop(future)
+                    try:
+                        outcome = future.result()
+                    except Exception as e:
+                        outcome = {"sha256": None, "skipped": False, "result": {
+                            "safe": False,
+                            "error": f"Erreur lors de l'analyse: {str(e)}",
+                            "recommendation": "reject"
+                        }}
+                    
+                    if outcome["skipped"]:
+                        summary["skipped"] += 1
+                        result = entry["result"]
+                    else:
+                        summary["analyzed"] += 1
+                        result = outcome["result"]
+                        entry = {
+                            "path": relative,
+                            "sha256": outcome["sha256"],
+                            "settings_fingerprint": fingerprint,
+                            "scanned_at": datetime.now().isoformat(),
+                            "result": result
+                        }
+                        entries[relative] = entry
+                        # Une ligne par fichier, écrite aussitôt: la reprise ne perd rien
+                        manifest.write(json.dumps(entry) + "\n")
+                        manifest.flush()
+                    
+                    if "error" in result:
+                        summary["errors"] += 1
+                    recommendation = result["recommendation"]
+                    summary["by_recommendation"][recommendation] = summary["by_recommendation"].get(recommendation, 0) + 1
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+    
+    if compact:
+        # Fichiers supprimés depuis le dernier parcours: leurs entrées disparaissent
+        compact_manifest(manifest_path, {path: entries[path] for path in seen})
+    
+    summary["elapsed_s"] = time.perf_counter() - start
+    summary["manifest"] = manifest_path
+    return summary
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-modération en masse du dossier des téléchargements")
+    parser.add_argument("--upload-dir", default=UPLOAD_DIR)
+    parser.add_argument("--manifest", default=DEFAULT_MANIFEST, help="Manifeste JSONL des résultats")
+    parser.add_argument("--workers", type=int, default=None, help="Processus d'analyse (défaut: nombre de CPU)")
+    parser.add_argument("--nudity-threshold", type=float, default=None)
+    parser.add_argument("--violence-threshold", type=float, default=None)
+    parser.add_argument("--force", action="store_true", help="Ré-analyser même les fichiers inchangés")
+    parser.add_argument("--no-compact", action="store_true", help="Ne pas réécrire le manifeste en fin de parcours")
+    args = parser.parse_args()
+    
+    moderator = ContentModerator(batch_workers=0, cache_size=0)
+    if args.nudity_threshold is not None:
+        moderator.nudity_threshold = args.nudity_threshold
+    if args.violence_threshold is not None:
+        moderator.violence_threshold = args.violence_threshold
+    
+    try:
+        summary = rescan(
+            upload_dir=args.upload_dir,
+            manifest_path=args.manifest,
+            workers=args.workers,
+            moderator=moderator,
+            force=args.force,
+            compact=not args.no_compact
+        )
+    except KeyboardInterrupt:
+        print("Interrompu: relancer la même commande pour reprendre", file=sys.stderr)
+        sys.exit(130)
+    print(json.dumps(summary, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+import numpy as np
+from typing import Dict, List, Tuple
+
+# Bornes (en fraction de la surface de l'image) de l'histogramme des tailles de zones
+BLOB_SIZE_EDGES = [0.0, 0.001, 0.01, 0.05, 0.1, 0.25, 1.0]
+
+def encode_runs(mask: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Encode chaque ligne d'un masque booléen en segments (run-length)
+    
+    Args:
+        mask: Masque booléen 2D
+    
+    Returns:
+        Tuple: Ligne, colonne de début et colonne de fin (exclue) de chaque segment,
+        triés par ligne puis par colonne
+    """
+    height, width = mask.shape
+    padded = np.zeros((height, width + 2), dtype=np.int8)
+    padded[:, 1:-1] = mask
+    edges = np.diff(padded, axis=1)
+    rows, starts = np.nonzero(edges == 1)
+    _, ends = np.nonzero(edges == -1)
+    return rows, starts, ends
+
+def _overlapping_run_pairs(rows: np.ndarray, starts: np.ndarray, ends: np.ndarray,
+                           stride: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Trouve les paires de segments 8-connexes situés sur deux lignes consécutives
+    
+    Les segments d'une ligne étant triés et disjoints, ceux de la ligne précédente
+    qui touchent un segment donné forment un intervalle contigu, localisé par
+    recherche dichotomique sur des clés (ligne, colonne) linéarisées.
+    """
+    start_keys = rows * stride + starts
+    end_keys = rows * stride + ends
+    previous_row = (rows - 1) * stride
+    first = np.searchsorted(end_keys, previous_row + starts, side="left")
+    last = np.searchsorted(start_keys, previous_row + ends, side="right")
+    counts = np.maximum(last - first, 0)
+    
+    total = int(counts.sum())
+    if total == 0:
+        empty = np.empty(0, dtype=np.intp)
+        return empty, empty
+    # Expansion vectorisée des intervalles [first, last) en paires explicites
+    current = np.repeat(np.arange(len(rows)), counts)
+    offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+    previous = np.repeat(first, counts) + offsets
+    return previous, current
+
+def _union_components(count: int, left: np.ndarray, right: np.ndarray) -> np.ndarray:
+    """
+    Fusionne les segments reliés (union-find vectorisé par propagation du minimum)
+    
+    Returns:
+        np.ndarray: Étiquette de composante (racine) de chaque segment
+    """
+    labels = np.arange(count)
+    while len(left):
+        left_roots = labels[left]
+        right_roots = labels[right]
+        if np.array_equal(left_roots, right_roots):
+            break
+        # Accrocher chaque racine à la plus petite racine voisine
+        smallest = np.minimum(left_roots, right_roots)
+        np.minimum.at(labels, left_roots, smallest)
+        np.minimum.at(labels, right_roots, smallest)
+        # Compression de chemins par sauts de pointeurs
+        while True:
+            jumped = labels[labels]
+            if np.array_equal(jumped, labels):
+                break
+            labels = jumped
+    return labels
+
+def analyze_skin_regions(mask: np.ndarray, large_blob_fraction: float = 0.01) -> Dict:
+    """
+    Étiquette les zones de peau connexes d'un masque (sous-échantillonné)
+    
+    Args:
+        mask: Masque booléen 2D des pixels de peau
+        large_blob_fraction: Taille minimale (fraction de l'image) d'une grande zone
+    
+    Returns:
+        Dict: Plus grande zone, surface couverte par les grandes zones,
+        nombre de zones et histogramme de leurs tailles
+    """
+    total_pixels = mask.size
+    histogram: List[int] = [0] * (len(BLOB_SIZE_EDGES) - 1)
+    if total_pixels == 0:
+        return {
+            "largest_blob": 0.0,
+            "large_area_ratio": 0.0,
+            "blob_count": 0,
+            "blob_size_histogram": histogram
+        }
+    
+    rows, starts, ends = encode_runs(mask)
+    previous, current = _overlapping_run_pairs(rows, starts, ends, mask.shape[1] + 2)
+    labels = _union_components(len(rows), previous, current)
+    
+    blob_sizes = np.bincount(labels, weights=ends - starts, minlength=len(rows))
+    blob_sizes = blob_sizes[blob_sizes > 0] / total_pixels
+    if len(blob_sizes):
+        histogram = np.histogram(blob_sizes, bins=BLOB_SIZE_EDGES)[0].tolist()
+    
+    return {
+        "largest_blob": float(blob_sizes.max()) if len(blob_sizes) else 0.0,
+        "large_area_ratio": float(blob_sizes[blob_sizes >= large_blob_fraction].sum()),
+        "blob_count": int(len(blob_sizes)),
+        "blob_size_histogram": histogram
+    }
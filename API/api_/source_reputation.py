@@ -0,0 +1,193 @@
+import os
+import mmap
+import struct
+import hashlib
+from typing import Dict, Optional, Tuple
+
+class SourceReputationTable:
+    """
+    Table persistante des verdicts par domaine, projetée en mémoire (mmap)
+    
+    Format du fichier: un en-tête de 16 octets (magic, version, capacité, nombre
+    d'entrées) suivi de capacity emplacements de 20 octets: empreinte du domaine
+    (blake2b sur 64 bits, 0 = emplacement libre) et trois compteurs u32
+    (analyses, contenus suspects, signalements). L'adressage est ouvert, à
+    sondage linéaire: une consultation ou une mise à jour touche quelques
+    octets du fichier, et le démarrage ne lit rien d'autre que l'en-tête.
+    
+    Au-delà de max_load, la table est recopiée dans un fichier de capacité
+    double qui remplace atomiquement l'ancien. Un seul processus doit écrire
+    dans un fichier donné. Un fichier corrompu ou tronqué est renommé en
+    <path>.corrupt et la table repart vide.
+    """
+    
+    MAGIC = b"SREP"
+    VERSION = 1
+    HEADER = struct.Struct("<4sIII")
+    SLOT = struct.Struct("<QIII")
+    
+    def __init__(self, path: str, initial_capacity: int = 4096, max_load: float = 0.7,
+                 prior_strength: float = 20.0, report_weight: float = 10.0):
+        self.path = path
+        self.max_load = max_load
+        # Poids de l'a priori (liste statique des sources) face aux observations
+        self.prior_strength = prior_strength
+        # Un signalement d'administration pèse comme report_weight analyses suspectes
+        self.report_weight = report_weight
+        
+        self._file = None
+        self._map: Optional[mmap.mmap] = None
+        self.capacity = 0
+        self.count = 0
+        capacity = max(16, 1 << (initial_capacity - 1).bit_length())
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            self._create(path, capacity)
+        try:
+            self._open()
+        except ValueError as e:
+            # Une table illisible ne doit pas empêcher le démarrage de l'API
+            self.close()
+            corrupt_path = f"{path}.corrupt"
+            os.replace(path, corrupt_path)
+            print(f"{e}: renommé en {corrupt_path}, table de réputation recréée vide")
+            self._create(path, capacity)
+            self._open()
+    
+    def _create(self, path: str, capacity: int):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(self.HEADER.pack(self.MAGIC, self.VERSION, capacity, 0))
+            f.truncate(self.HEADER.size + capacity * self.SLOT.size)
+    
+    def _open(self):
+        self._file = open(self.path, "r+b")
+        self._map = mmap.mmap(self._file.fileno(), 0)
+        if len(self._map) < self.HEADER.size:
+            raise ValueError(f"Fichier de réputation tronqué: {self.path}")
+        magic, version, capacity, count = self.HEADER.unpack_from(self._map, 0)
+        if magic != self.MAGIC or version != self.VERSION:
+            raise ValueError(f"Fichier de réputation invalide: {self.path}")
+        # Le sondage linéaire suppose une capacité puissance de deux, jamais pleine
+        if capacity == 0 or capacity & (capacity - 1) or count >= capacity:
+            raise ValueError(f"Fichier de réputation invalide: {self.path}")
+        if len(self._map) != self.HEADER.size + capacity * self.SLOT.size:
+            raise ValueError(f"Fichier de réputation tronqué: {self.path}")
+        self.capacity = capacity
+        self.count = count
+    
+    @staticmethod
+    def domain_key(domain: str) -> int:
+        """Empreinte non nulle d'un domaine"""
+        key = int.from_bytes(hashlib.blake2b(domain.encode("utf-8"), digest_size=8).digest(), "little")
+        return key or 1
+    
+    def _find(self, key: int) -> Tuple[int, bool]:
+        """Emplacement de la clé, ou premier emplacement libre de sa séquence de sondage"""
+        mask = self.capacity - 1
+        index = key & mask
+        while True:
+            offset = self.HEADER.size + index * self.SLOT.size
+            stored = self.SLOT.unpack_from(self._map, offset)[0]
+            if stored == key:
+                return offset, True
+            if stored == 0:
+                return offset, False
+            index = (index + 1) & mask
+    
+    def get(self, domain: str) -> Optional[Tuple[int, int, int]]:
+        """
+        Compteurs d'un domaine
+        
+        Returns:
+            Optional[Tuple[int, int, int]]: (analyses, contenus suspects, signalements) ou None
+        """
+        offset, found = self._find(self.domain_key(domain))
+        if not found:
+            return None
+        return self.SLOT.unpack_from(self._map, offset)[1:]
+    
+    def _increment(self, domain: str, analyses: int = 0, flagged: int = 0, reports: int = 0):
+        key = self.domain_key(domain)
+        offset, found = self._find(key)
+        if found:
+            _, current_analyses, current_flagged, current_reports = self.SLOT.unpack_from(self._map, offset)
+        else:
+            if (self.count + 1) > self.capacity * self.max_load:
+                self._grow()
+                offset, _ = self._find(key)
+            current_analyses = current_flagged = current_reports = 0
+            self.count += 1
+            self.HEADER.pack_into(self._map, 0, self.MAGIC, self.VERSION, self.capacity, self.count)
+        self.SLOT.pack_into(
+            self._map, offset, key,
+            min(current_analyses + analyses, 0xFFFFFFFF),
+            min(current_flagged + flagged, 0xFFFFFFFF),
+            min(current_reports + reports, 0xFFFFFFFF)
+        )
+    
+    def record_analysis(self, domain: str, flagged: bool):
+        """Compte une analyse d'un contenu de ce domaine (flagged: contenu jugé suspect)"""
+        self._increment(domain, analyses=1, flagged=int(flagged))
+    
+    def record_report(self, domain: str):
+        """Compte un signalement d'un contenu de ce domaine"""
+        self._increment(domain, reports=1)
+    
+    def trust_score(self, counts: Tuple[int, int, int], prior: float) -> float:
+        """
+        Score de confiance appris: moyenne de l'a priori (pesant prior_strength
+        observations) et de la part d'observations favorables
+        """
+        analyses, flagged, reports = counts
+        weighted_reports = reports * self.report_weight
+        total = analyses + weighted_reports
+        favorable = analyses - flagged
+        return (prior * self.prior_strength + favorable) / (self.prior_strength + total)
+    
+    def _grow(self):
+        """Recopie la table dans un fichier de capacité double, puis le substitue"""
+        entries = [
+            slot for slot in self.SLOT.iter_unpack(self._map[self.HEADER.size:])
+            if slot[0]
+        ]
+        temp_path = f"{self.path}.tmp"
+        capacity = self.capacity * 2
+        self._create(temp_path, capacity)
+        with open(temp_path, "r+b") as f:
+            new_map = mmap.mmap(f.fileno(), 0)
+            mask = capacity - 1
+            for slot in entries:
+                index = slot[0] & mask
+                while self.SLOT.unpack_from(new_map, self.HEADER.size + index * self.SLOT.size)[0]:
+                    index = (index + 1) & mask
+                self.SLOT.pack_into(new_map, self.HEADER.size + index * self.SLOT.size, *slot)
+            self.HEADER.pack_into(new_map, 0, self.MAGIC, self.VERSION, capacity, len(entries))
+            new_map.flush()
+            new_map.close()
+        self.close()
+        os.replace(temp_path, self.path)
+        self._open()
+    
+    def flush(self):
+        """Force l'écriture sur disque des pages modifiées"""
+        if self._map is not None:
+            self._map.flush()
+    
+    def close(self):
+        if self._map is not None:
+            self._map.flush()
+            self._map.close()
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+    
+    def get_stats(self) -> Dict:
+        return {
+            "path": self.path,
+            "domains": self.count,
+            "capacity": self.capacity,
+            "file_bytes": self.HEADER.size + self.capacity * self.SLOT.size
+        }
@@ -0,0 +1,62 @@
+import os
+import sys
+import asyncio
+import subprocess
+import numpy as np
+import pytest
+
+from image_classifier import TorchClassifierBackend, compare_throughput
+
+MODULE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def _random_thumbnails(count: int, size: int):
+    rng = np.random.default_rng(0)
+    return [rng.integers(0, 256, (size, size, 3), dtype=np.uint8) for _ in range(count)]
+
+@pytest.mark.parametrize("module", ["content_moderator", "image_classifier"])
+def test_import_does_not_load_torch(module):
+    # Processus neuf: les autres tests chargent torch dans celui-ci
+    code = f"import sys, {module}; print('torch' in sys.modules)"
+    output = subprocess.run(
+        [sys.executable, "-c", code], cwd=MODULE_DIR, capture_output=True, text=True, check=True
+    ).stdout
+    assert output.strip() == "False"
+
+def test_scheduler_batches_concurrent_requests():
+    pytest.importorskip("torch")
+    backend = TorchClassifierBackend(input_size=32, max_batch_size=16, max_wait_ms=50.0)
+    thumbnails = _random_thumbnails(40, backend.input_size)
+    expected = backend.predict_batch(thumbnails)
+
+    async def predict_all():
+        try:
+            return await asyncio.gather(*(backend.predict(thumbnail) for thumbnail in thumbnails))
+        finally:
+            backend.close()
+
+    scores = asyncio.run(predict_all())
+
+    # Chaque requête reçoit ses propres scores, quel que soit son micro-batch
+    assert np.allclose(scores, expected, atol=1e-5)
+    metrics = backend.get_metrics()
+    assert metrics["requests"] == 40
+    assert metrics["max_batch_size"] == 16
+    assert metrics["batches"] == 3
+
+def test_compare_throughput_with_random_model():
+    pytest.importorskip("torch")
+    backend = TorchClassifierBackend(input_size=32, max_batch_size=16, max_wait_ms=2.0)
+
+    async def measure():
+        try:
+            return await compare_throughput(backend, requests=64)
+        finally:
+            backend.close()
+
+    result = asyncio.run(measure())
+
+    assert result["requests"] == 64
+    assert result["per_image_images_per_sec"] > 0
+    assert result["micro_batched_images_per_sec"] > 0
+    assert result["scheduler"]["requests"] == 64
+    assert result["scheduler"]["max_batch_size"] > 1
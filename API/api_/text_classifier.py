@@ -0,0 +1,255 @@
+import os
+import time
+import importlib.util
+import numpy as np
+from typing import Dict, Iterator, List, Tuple
+
+# scikit-learn est optionnel: sans lui, FakeNewsDetector se limite aux règles.
+# Il n'est importé qu'au chargement ou à l'entraînement d'un modèle (~1.5 s)
+def sklearn_available() -> bool:
+    """Indique si scikit-learn et joblib sont installés, sans les importer"""
+    return importlib.util.find_spec("sklearn") is not None and importlib.util.find_spec("joblib") is not None
+
+# Étiquettes acceptées dans les fichiers d'entraînement (1 = fausse information)
+FAKE_LABELS = {"1", "fake", "true", "suspicious"}
+RELIABLE_LABELS = {"0", "reliable", "false", "real"}
+
+def make_vectorizer(n_features: int = 2 ** 20, ngram_max: int = 2) -> "HashingVectorizer":
+    """
+    Vectoriseur sans état: les mots et bigrammes sont hachés dans n_features
+    colonnes, la mémoire ne dépend donc pas de la taille du vocabulaire
+    """
+    from sklearn.feature_extraction.text import HashingVectorizer
+    
+    return HashingVectorizer(
+        n_features=n_features,
+        ngram_range=(1, ngram_max),
+        alternate_sign=False,
+        norm="l2",
+        lowercase=True
+    )
+
+def parse_label(value) -> int:
+    """Convertit une étiquette du fichier d'entraînement en 0 / 1"""
+    label = str(value).strip().lower()
+    if label in FAKE_LABELS:
+        return 1
+    if label in RELIABLE_LABELS:
+        return 0
+    raise ValueError(f"Étiquette inconnue: {value!r}")
+
+def iter_labelled_chunks(data_path: str, chunk_size: int = 10000) -> Iterator[Tuple[List[str], List[int]]]:
+    """
+    Lit un fichier étiqueté par blocs (colonnes content et label)
+    
+    Formats: CSV (.csv, .tsv) ou JSON lignes (.jsonl, .ndjson).
+    """
+    import pandas as pd
+    
+    extension = os.path.splitext(data_path)[1].lower()
+    if extension in (".jsonl", ".ndjson"):
+        reader = pd.read_json(data_path, lines=True, chunksize=chunk_size)
+    elif extension in (".csv", ".tsv"):
+        reader = pd.read_csv(data_path, sep="\t" if extension == ".tsv" else ",", chunksize=chunk_size)
+    else:
+        raise ValueError(f"Format de fichier non supporté: {extension}")
+    
+    for chunk in reader:
+        chunk = chunk.dropna(subset=["content", "label"])
+        yield chunk["content"].astype(str).tolist(), [parse_label(label) for label in chunk["label"]]
+
+def train(data_path: str, model_path: str, n_features: int = 2 ** 20, ngram_max: int = 2,
+          epochs: int = 3, chunk_size: int = 10000, alpha: float = 1e-5) -> Dict:
+    """
+    Entraîne hors ligne un modèle linéaire (régression logistique par SGD)
+    
+    Le fichier est relu à chaque époque par blocs de chunk_size lignes: la mémoire
+    d'entraînement ne dépend ni de la taille du fichier ni du vocabulaire.
+    
+    Args:
+        data_path: Fichier étiqueté (voir iter_labelled_chunks)
+        model_path: Fichier du modèle à écrire (joblib)
+        n_features: Nombre de colonnes du hachage
+        ngram_max: Taille maximale des n-grammes de mots
+        epochs: Nombre de passes sur le fichier
+        chunk_size: Lignes par bloc
+        alpha: Régularisation L2
+    
+    Returns:
+        Dict: Résumé de l'entraînement
+    """
+    if not sklearn_available():
+        raise ImportError("scikit-learn est requis pour entraîner le classifieur de texte")
+    import joblib
+    from sklearn.linear_model import SGDClassifier
+    
+    vectorizer = make_vectorizer(n_features, ngram_max)
+    model = SGDClassifier(loss="log_loss", alpha=alpha, random_state=0)
+    
+    start = time.perf_counter()
+    samples = 0
+    positives = 0
+    for epoch in range(epochs):
+        for texts, labels in iter_labelled_chunks(data_path, chunk_size):
+            if not texts:
+                continue
+            model.partial_fit(vectorizer.transform(texts), labels, classes=[0, 1])
+            if epoch == 0:
+                samples += len(labels)
+                positives += sum(labels)
+    if not samples:
+        raise ValueError(f"Aucun exemple étiqueté dans {data_path}")
+    
+    directory = os.path.dirname(model_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    joblib.dump({
+        "vectorizer": {"n_features": n_features, "ngram_max": ngram_max},
+        "model": model
+    }, model_path)
+    
+    return {
+        "samples": samples,
+        "fake_ratio": positives / samples,
+        "epochs": epochs,
+        "n_features": n_features,
+        "training_s": time.perf_counter() - start,
+        "model_path": model_path
+    }
+
+class HashingTextClassifier:
+    """
+    Backend statistique de FakeNewsDetector: HashingVectorizer et modèle linéaire
+    
+    Le modèle n'est chargé qu'à la première prédiction. Un lot de textes est
+    vectorisé en une matrice creuse unique puis scoré par un seul produit
+    matrice creuse / vecteur de poids.
+    """
+    
+    def __init__(self, model_path: str):
+        if not sklearn_available():
+            raise ImportError("scikit-learn est requis pour HashingTextClassifier")
+        self.model_path = model_path
+        self.vectorizer = None
+        self.model = None
+        self._positive_column = 1
+        self.metrics = {"predictions": 0, "batches": 0, "total_ms": 0.0}
+    
+    def load(self):
+        """Charge le modèle entraîné par train() depuis model_path"""
+        if self.model is not None:
+            return self.model
+        import joblib
+        
+        payload = joblib.load(self.model_path)
+        self.vectorizer = make_vectorizer(**payload["vectorizer"])
+        model = payload["model"]
+        self._positive_column = list(model.classes_).index(1)
+        self.model = model
+        return model
+    
+    def predict_batch(self, texts: List[str]) -> List[float]:
+        """
+        Probabilité de fausse information pour chaque texte
+        
+        Returns:
+            List[float]: Scores entre 0 et 1, dans l'ordre des textes
+        """
+        if not texts:
+            return []
+        model = self.load()
+        start = time.perf_counter()
+        probabilities = model.predict_proba(self.vectorizer.transform(texts))[:, self._positive_column]
+        self.metrics["predictions"] += len(texts)
+        self.metrics["batches"] += 1
+        self.metrics["total_ms"] += (time.perf_counter() - start) * 1000
+        return probabilities.tolist()
+    
+    def get_metrics(self) -> Dict:
+        predictions = self.metrics["predictions"]
+        return {
+            "loaded": self.model is not None,
+            "predictions": predictions,
+            "batches": self.metrics["batches"],
+            "average_item_ms": self.metrics["total_ms"] / predictions if predictions else 0.0
+        }
+
+def benchmark(classifier: HashingTextClassifier, texts: List[str],
+              batch_sizes: Tuple[int, ...] = (1, 32, 256, 4096)) -> Dict:
+    """
+    Mesure le coût CPU par texte de la prédiction selon la taille des lots
+    
+    Args:
+        classifier: Backend à mesurer
+        texts: Textes de test (réutilisés si un lot est plus grand)
+        batch_sizes: Tailles de lot mesurées
+    
+    Returns:
+        Dict: Microsecondes par texte et textes par seconde, par taille de lot
+    """
+    classifier.load()
+    classifier.predict_batch(texts[:1])
+    
+    results = {}
+    for batch_size in batch_sizes:
+        batch = (texts * (batch_size // len(texts) + 1))[:batch_size]
+        repeats = max(1, 4096 // batch_size)
+        start = time.perf_counter()
+        for _ in range(repeats):
+            classifier.predict_batch(batch)
+        elapsed = time.perf_counter() - start
+        items = repeats * batch_size
+        results[str(batch_size)] = {
+            "us_per_item": elapsed / items * 1e6,
+            "items_per_sec": items / elapsed
+        }
+    return results
+
+def synthetic_corpus(size: int = 2000, seed: int = 0) -> Tuple[List[str], List[int]]:
+    """Corpus étiqueté synthétique (mesures de débit, essais sans données réelles)"""
+    rng = np.random.default_rng(seed)
+    neutral = ("le la les un une des de du et en pour sur avec dans par cours élèves professeur "
+               "examen résultats ministère école université recherche étude publication rapport").split()
+    suspicious = ("urgent choc miracle gratuit secret incroyable partagez alerte complot cache "
+                  "vérité interdit remède scandale").split()
+    texts, labels = [], []
+    for _ in range(size):
+        label = int(rng.random() < 0.5)
+        vocabulary = neutral + suspicious if label else neutral
+        words = rng.choice(vocabulary, size=int(rng.integers(20, 200)))
+        texts.append(" ".join(words))
+        labels.append(label)
+    return texts, labels
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    import tempfile
+    
+    parser = argparse.ArgumentParser(description="Classifieur de texte pour la détection de fake news")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    
+    train_parser = subparsers.add_parser("train", help="Entraîner un modèle depuis un fichier étiqueté")
+    train_parser.add_argument("data", help="Fichier CSV/TSV/JSONL avec les colonnes content et label")
+    train_parser.add_argument("--model", default=os.path.join("models", "fake_news_text.joblib"))
+    train_parser.add_argument("--n-features", type=int, default=2 ** 20)
+    train_parser.add_argument("--epochs", type=int, default=3)
+    
+    bench_parser = subparsers.add_parser("bench", help="Mesurer le coût par texte de la prédiction")
+    bench_parser.add_argument("--model", default=None, help="Modèle à mesurer (défaut: modèle synthétique)")
+    args = parser.parse_args()
+    
+    if args.command == "train":
+        print(json.dumps(train(args.data, args.model, n_features=args.n_features, epochs=args.epochs), indent=2))
+    else:
+        texts, labels = synthetic_corpus()
+        with tempfile.TemporaryDirectory() as directory:
+            model_path = args.model
+            if model_path is None:
+                data_path = os.path.join(directory, "corpus.jsonl")
+                with open(data_path, "w", encoding="utf-8") as f:
+                    for text, label in zip(texts, labels):
+                        f.write(json.dumps({"content": text, "label": label}) + "\n")
+                model_path = os.path.join(directory, "model.joblib")
+                train(data_path, model_path)
+            print(json.dumps(benchmark(HashingTextClassifier(model_path), texts), indent=2))